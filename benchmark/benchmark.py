@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+
+# Copyright 2015-2025 Louis Paternault
+#
+# Sphinxcontrib-Proof is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sphinxcontrib-Proof is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Sphinxcontrib-Proof.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Benchmark sphinxcontrib-proof on synthetic, theorem-heavy projects.
+
+For each combination of parameters, a Sphinx project is generated, then built
+with each of the requested builders (each build runs in its own process, from
+scratch). Read time, write time, peak memory, and size of the pickled
+environment and doctrees are written as JSON.
+
+Example::
+
+    python3 benchmark/benchmark.py --documents 100 500 --statements 20 \\
+        --builders html latex --output results.json
+
+    # Later, compare with a previous run
+    python3 benchmark/benchmark.py --documents 100 500 --statements 20 \\
+        --builders html latex --compare results.json
+"""
+
+import argparse
+import itertools
+import json
+import pathlib
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+PARAMETERS = {
+    # name: (type, default, help)
+    "documents": (int, [100], "number of documents"),
+    "statements": (int, [20], "number of statements per document"),
+    "types": (int, [10], "number of theorem types in proof_theorem_types"),
+    "depth": (int, [1], "nesting depth of statements (1 means no nesting)"),
+    "xrefs": (float, [1.0], "number of cross-references per statement"),
+}
+
+################################################################################
+# Project generation
+
+
+def _statement(out, rng, labels, *, types, depth, xrefs, indent=""):
+    """Write a (possibly nested) statement, and return its label."""
+    # pylint: disable=too-many-arguments
+    label = f"s{len(labels)}"
+    thmtype = f"type{rng.randrange(types)}"
+    print(f"{indent}.. _{label}:", file=out)
+    print(file=out)
+    print(f"{indent}.. proof:{thmtype}:: Statement {len(labels)}", file=out)
+    print(file=out)
+
+    text = ["Let :math:`x` be a *real* number."]
+    count = int(xrefs) + (rng.random() < xrefs - int(xrefs))
+    for _ in range(count):
+        if not labels:
+            break
+        target = rng.choice(labels)
+        text.append(
+            rng.choice(
+                [
+                    f"See :numref:`{target}`.",
+                    f"See :proof:ref:`{target}`.",
+                    f"See :proof:numref:`{target}`.",
+                ]
+            )
+        )
+    print(f"{indent}   {' '.join(text)}", file=out)
+    print(file=out)
+
+    if depth > 1:
+        _statement(
+            out,
+            rng,
+            labels,
+            types=types,
+            depth=depth - 1,
+            xrefs=xrefs,
+            indent=indent + "   ",
+        )
+
+    labels.append(label)
+    return label
+
+
+def generate(
+    srcdir, *, documents, statements, types, depth, xrefs, seed=0
+):  # pylint: disable=too-many-arguments
+    """Generate a Sphinx project in `srcdir`."""
+    rng = random.Random(seed)
+    srcdir = pathlib.Path(srcdir)
+    srcdir.mkdir(parents=True, exist_ok=True)
+
+    thmtypes = {f"type{i}": f"Type {i}" for i in range(types)}
+    (srcdir / "conf.py").write_text(
+        "\n".join(
+            [
+                'extensions = ["sphinxcontrib.proof"]',
+                "numfig = True",
+                f"proof_theorem_types = {thmtypes!r}",
+                'proof_latex_main = "type0"',
+                # Sidebars are costly, and have nothing to do with this extension
+                'html_sidebars = {"**": []}',
+                "",
+            ]
+        ),
+        encoding="utf8",
+    )
+
+    with open(srcdir / "index.rst", mode="w", encoding="utf8") as out:
+        print("Benchmark\n=========\n", file=out)
+        print(".. toctree::\n   :numbered:\n", file=out)
+        for doc in range(documents):
+            print(f"   doc{doc}", file=out)
+
+    labels = []
+    for doc in range(documents):
+        with open(srcdir / f"doc{doc}.rst", mode="w", encoding="utf8") as out:
+            title = f"Document {doc}"
+            print(f"{title}\n{'=' * len(title)}\n", file=out)
+            for _ in range(statements):
+                _statement(out, rng, labels, types=types, depth=depth, xrefs=xrefs)
+
+
+################################################################################
+# Measures
+
+
+def _size(path):
+    """Return the size of a file, or the total size of a directory tree."""
+    path = pathlib.Path(path)
+    if path.is_file():
+        return path.stat().st_size
+    return sum(file.stat().st_size for file in path.rglob("*") if file.is_file())
+
+
+def build(srcdir, builddir, builder, jobs=1):
+    """Build the project (in the current process), and return measures.
+
+    This function is meant to be run in a fresh process (see :func:`measure`).
+    """
+    # pylint: disable=import-outside-toplevel
+    import io
+
+    from sphinx.application import Sphinx
+
+    # Builders do not share their environment, so that sizes are theirs
+    doctreedir = pathlib.Path(builddir) / "doctrees" / builder
+    now = time.perf_counter
+    timestamps = {}
+
+    app = Sphinx(
+        srcdir,
+        srcdir,
+        pathlib.Path(builddir) / builder,
+        doctreedir,
+        builder,
+        status=None,
+        warning=io.StringIO(),
+        freshenv=True,
+        parallel=jobs,
+    )
+
+    def read_finished(app, env):  # pylint: disable=unused-argument
+        timestamps["read"] = now()
+
+    app.connect("env-updated", read_finished)
+
+    start = now()
+    app.build()
+    end = now()
+
+    return {
+        "read": timestamps["read"] - start,
+        "write": end - timestamps["read"],
+        "total": end - start,
+        # Parallel builds fork processes, whose memory counts as well.
+        # On Linux, ru_maxrss is in kilobytes.
+        "peak_rss": max(
+            resource.getrusage(who).ru_maxrss
+            for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN)
+        )
+        * 1024,
+        "environment_pickle": _size(doctreedir / "environment.pickle"),
+        "doctrees": _size(doctreedir) - _size(doctreedir / "environment.pickle"),
+    }
+
+
+def measure(srcdir, builddir, builder, jobs=1):
+    """Build the project in a subprocess, and return measures."""
+    process = subprocess.run(
+        [
+            sys.executable,
+            __file__,
+            "--build-one",
+            str(srcdir),
+            str(builddir),
+            builder,
+            str(jobs),
+        ],
+        check=True,
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    return json.loads(process.stdout)
+
+
+################################################################################
+# Main
+
+
+def versions():
+    """Return versions of relevant software."""
+    # pylint: disable=import-outside-toplevel
+    import docutils
+    import sphinx
+
+    import sphinxcontrib.proof
+
+    return {
+        "python": platform.python_version(),
+        "sphinx": sphinx.__version__,
+        "docutils": docutils.__version__,
+        "sphinxcontrib-proof": sphinxcontrib.proof.VERSION,
+    }
+
+
+def compare(results, previous):
+    """Print the relative change between `previous` and `results`."""
+
+    def key(run):
+        return (tuple(sorted(run["parameters"].items())), run["builder"])
+
+    previous = {key(run): run for run in previous["runs"]}
+    for run in results["runs"]:
+        if key(run) not in previous:
+            continue
+        old = previous[key(run)]
+        changes = ", ".join(
+            f"{measure} {100 * (run[measure] - old[measure]) / old[measure]:+.1f}%"
+            for measure in ("read", "write", "peak_rss", "environment_pickle")
+            if old[measure]
+        )
+        print(f"{run['builder']} {run['parameters']}: {changes}")
+
+
+def argument_parser():
+    """Return the command line parser."""
+    parser = argparse.ArgumentParser(
+        description=__doc__.split("\n", maxsplit=1)[0],
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    for name, (kind, default, helptext) in PARAMETERS.items():
+        parser.add_argument(
+            f"--{name}", type=kind, nargs="+", default=default, help=helptext
+        )
+    parser.add_argument(
+        "--builders",
+        nargs="+",
+        default=["html", "singlehtml", "latex"],
+        help="builders to measure",
+    )
+    parser.add_argument(
+        "--jobs", type=int, default=1, help="number of parallel jobs (sphinx -j)"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    parser.add_argument(
+        "--workdir",
+        default=None,
+        help="directory where projects are generated and built (default: temporary)",
+    )
+    parser.add_argument(
+        "--output", default=None, help="write results to this file (default: stdout)"
+    )
+    parser.add_argument(
+        "--compare", default=None, help="compare results with this previous output"
+    )
+    parser.add_argument("--build-one", nargs=4, help=argparse.SUPPRESS)
+    return parser
+
+
+def main():
+    """Main function."""
+    options = argument_parser().parse_args()
+
+    if options.build_one:
+        srcdir, builddir, builder, jobs = options.build_one
+        print(json.dumps(build(srcdir, builddir, builder, int(jobs))))
+        return
+
+    results = {"versions": versions(), "runs": []}
+    with tempfile.TemporaryDirectory() as tempdir:
+        workdir = pathlib.Path(options.workdir or tempdir)
+        for values in itertools.product(
+            *(getattr(options, name) for name in PARAMETERS)
+        ):
+            parameters = dict(zip(PARAMETERS, values))
+            name = "-".join(f"{key}{value}" for key, value in parameters.items())
+            srcdir = workdir / name / "source"
+            generate(srcdir, seed=options.seed, **parameters)
+            for builder in options.builders:
+                print(f"Building {name} ({builder})…", file=sys.stderr)
+                run = measure(srcdir, workdir / name / "build", builder, options.jobs)
+                run.update(parameters=parameters, builder=builder, jobs=options.jobs)
+                results["runs"].append(run)
+
+    if options.output:
+        with open(options.output, mode="w", encoding="utf8") as file:
+            json.dump(results, file, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+    if options.compare:
+        with open(options.compare, encoding="utf8") as file:
+            compare(results, json.load(file))
+
+
+if __name__ == "__main__":
+    main()
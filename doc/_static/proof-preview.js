@@ -0,0 +1,184 @@
+/* Previews of referenced theorems (see option proof_html_previews).
+ *
+ * Hovering (or focusing) a link to a theorem displays a preview of this
+ * theorem. Previews are read from directory _proof/previews, at the root of
+ * the documentation (see sphinxcontrib/proof/previews.py): there is one small
+ * file per document, so only the file of the target document is downloaded
+ * (once), instead of the target page. When the browser is idle, the files of
+ * the documents linked from the current page are prefetched.
+ */
+(function () {
+  "use strict";
+
+  // Delays (in milliseconds) before showing and hiding previews
+  const SHOW_DELAY = 300;
+  const HIDE_DELAY = 200;
+  const LINKS = "a.reference.internal > .proof";
+
+  // This script is in directory _static, at the root of the documentation
+  const root = new URL("..", document.currentScript.src);
+  // Map URLs to promises of their (JSON) content
+  const files = new Map();
+
+  // Return the URL of the previews of page `url` (or null if `url` is not part
+  // of this documentation)
+  function previewsURL(url) {
+    if (url.origin !== root.origin || !url.pathname.startsWith(root.pathname)) {
+      return null;
+    }
+    let path = url.pathname.slice(root.pathname.length);
+    if (path === "" || path.endsWith("/")) {
+      path += "index.html";
+    }
+    return new URL(`_proof/previews/${path}.json`, root);
+  }
+
+  function fetchPreviews(url) {
+    if (!files.has(url.href)) {
+      files.set(
+        url.href,
+        fetch(url).then(function (response) {
+          if (response.ok) {
+            return response.json();
+          }
+          if (response.status === 404) {
+            // Documents without theorems have no previews
+            return { statements: [], anchors: {} };
+          }
+          throw new Error(response.status + " " + response.statusText);
+        }).catch(function (error) {
+          // Try again next time
+          files.delete(url.href);
+          throw error;
+        })
+      );
+    }
+    return files.get(url.href);
+  }
+
+  // Return (a promise of) the preview of the target of `link`, or null
+  function getPreview(link) {
+    const target = new URL(link.href);
+    const url = previewsURL(target);
+    if (url === null) {
+      return Promise.resolve(null);
+    }
+    return fetchPreviews(url).then(function (previews) {
+      const index = previews.anchors[decodeURIComponent(target.hash.slice(1))];
+      if (index === undefined) {
+        return null;
+      }
+      const template = document.createElement("template");
+      template.innerHTML = previews.statements[index];
+      // URLs are relative to the target page
+      for (const attribute of ["href", "src"]) {
+        for (const element of template.content.querySelectorAll(`[${attribute}]`)) {
+          element.setAttribute(
+            attribute,
+            new URL(element.getAttribute(attribute), target).href
+          );
+        }
+      }
+      // Ids already exist in the target page, and might exist in this one
+      for (const element of template.content.querySelectorAll("[id]")) {
+        element.removeAttribute("id");
+      }
+      return template.content;
+    });
+  }
+
+  function init(links) {
+    const popup = document.createElement("div");
+    popup.className = "proof-preview";
+    popup.setAttribute("role", "tooltip");
+    popup.hidden = true;
+    document.body.append(popup);
+
+    let current = null;
+    let timeout = null;
+
+    function show(link) {
+      clearTimeout(timeout);
+      current = link;
+      timeout = setTimeout(function () {
+        getPreview(link)
+          .then(function (preview) {
+            if (current !== link || preview === null) {
+              return;
+            }
+            popup.replaceChildren(preview);
+            const rect = link.getBoundingClientRect();
+            popup.style.left = `${rect.left + window.scrollX}px`;
+            popup.style.top = `${rect.bottom + window.scrollY}px`;
+            popup.hidden = false;
+          })
+          .catch(function () {
+            // No preview: the link still works
+          });
+      }, SHOW_DELAY);
+    }
+
+    function hide() {
+      clearTimeout(timeout);
+      timeout = setTimeout(function () {
+        current = null;
+        popup.hidden = true;
+      }, HIDE_DELAY);
+    }
+
+    for (const link of links) {
+      link.addEventListener("mouseenter", () => show(link));
+      link.addEventListener("focus", () => show(link));
+      link.addEventListener("mouseleave", hide);
+      link.addEventListener("blur", hide);
+    }
+    // Keep the preview open while it is hovered
+    popup.addEventListener("mouseenter", () => clearTimeout(timeout));
+    popup.addEventListener("mouseleave", hide);
+    document.addEventListener("keydown", function (event) {
+      if (event.key === "Escape") {
+        clearTimeout(timeout);
+        current = null;
+        popup.hidden = true;
+      }
+    });
+  }
+
+  // Prefetch the previews of the documents linked from this page, one at a
+  // time, when the browser is idle
+  function prefetch(links) {
+    const urls = new Map();
+    for (const link of links) {
+      const url = previewsURL(new URL(link.href));
+      if (url !== null) {
+        urls.set(url.href, url);
+      }
+    }
+    const pending = Array.from(urls.values());
+    const idle = window.requestIdleCallback || ((callback) => setTimeout(callback, 1000));
+    function next() {
+      const url = pending.shift();
+      if (url === undefined) {
+        return;
+      }
+      fetchPreviews(url).catch(() => null).then(() => idle(next));
+    }
+    idle(next);
+  }
+
+  function initAll() {
+    const links = Array.from(
+      new Set(Array.from(document.querySelectorAll(LINKS), (span) => span.parentElement))
+    );
+    if (links.length) {
+      init(links);
+      prefetch(links);
+    }
+  }
+
+  if (document.readyState === "loading") {
+    document.addEventListener("DOMContentLoaded", initAll);
+  } else {
+    initAll();
+  }
+})();
@@ -0,0 +1,168 @@
+/* Search theorems (see option proof_html_search).
+ *
+ * Every element with class "proof-search" is turned into a search field. The
+ * search index is in directory _proof/search, at the root of the
+ * documentation (see sphinxcontrib/proof/search.py):
+ * - words are split into shards (named after their first two characters),
+ *   mapping words to indexes of statements;
+ * - statements are stored by chunks of CHUNK_SIZE, in directory statements.
+ * Only shards of words being searched, and chunks of statements being
+ * displayed, are downloaded (once).
+ *
+ * A statement matches if, for each word of the query, one of its words
+ * starts with that word (one-character words must match exactly).
+ */
+(function () {
+  "use strict";
+
+  const PREFIX_LENGTH = 2;
+  const CHUNK_SIZE = 64;
+  const MAX_RESULTS = 50;
+  const WORD = /[\p{L}\p{N}\p{M}_]+/gu;
+
+  // This script is in directory _static, at the root of the documentation
+  const root = new URL("..", document.currentScript.src);
+  // Map URLs to promises of their (JSON) content
+  const files = new Map();
+
+  function shardName(word) {
+    const prefix = Array.from(word).slice(0, PREFIX_LENGTH).join("");
+    if (/^[a-z0-9]+$/.test(prefix)) {
+      return prefix;
+    }
+    let hex = "x";
+    for (const byte of new TextEncoder().encode(prefix)) {
+      hex += byte.toString(16).padStart(2, "0");
+    }
+    return hex;
+  }
+
+  function fetchJSON(path, missing) {
+    if (!files.has(path)) {
+      files.set(
+        path,
+        fetch(new URL(`_proof/search/${path}`, root)).then(function (response) {
+          if (response.ok) {
+            return response.json();
+          }
+          if (response.status === 404 && missing !== undefined) {
+            return missing;
+          }
+          throw new Error(response.status + " " + response.statusText);
+        }).catch(function (error) {
+          // Try again next time
+          files.delete(path);
+          throw error;
+        })
+      );
+    }
+    return files.get(path);
+  }
+
+  // Return the set of indexes of statements matching `word`
+  function searchWord(word) {
+    // A missing shard means that no word has this prefix
+    return fetchJSON(`${shardName(word)}.json`, {}).then(function (shard) {
+      const matches = new Set();
+      const exact = Array.from(word).length < PREFIX_LENGTH;
+      for (const [token, indexes] of Object.entries(shard)) {
+        if (exact ? token === word : token.startsWith(word)) {
+          indexes.forEach((index) => matches.add(index));
+        }
+      }
+      return matches;
+    });
+  }
+
+  // Return the sorted list of indexes of statements matching `query`
+  function search(query) {
+    const words = Array.from(new Set(query.toLowerCase().match(WORD) || []));
+    if (!words.length) {
+      return Promise.resolve([]);
+    }
+    return Promise.all(words.map(searchWord)).then(function ([first, ...others]) {
+      return Array.from(first)
+        .filter((index) => others.every((other) => other.has(index)))
+        .sort((a, b) => a - b);
+    });
+  }
+
+  // Return the statements of `indexes`
+  function getRecords(indexes) {
+    return Promise.all(
+      indexes.map(function (index) {
+        return fetchJSON(`statements/${Math.floor(index / CHUNK_SIZE)}.json`).then(
+          (chunk) => chunk[index % CHUNK_SIZE]
+        );
+      })
+    );
+  }
+
+  function render(list, records, total) {
+    list.replaceChildren();
+    for (const [type, number, title, summary, uri] of records) {
+      const item = document.createElement("li");
+      const link = document.createElement("a");
+      link.href = new URL(uri, root);
+      link.textContent = number ? `${type} ${number}` : type;
+      if (title) {
+        link.textContent += ` (${title})`;
+      }
+      item.append(link);
+      if (summary) {
+        const text = document.createElement("span");
+        text.className = "proof-search-summary";
+        text.textContent = summary;
+        item.append(" ", text);
+      }
+      list.append(item);
+    }
+    if (total > records.length) {
+      const item = document.createElement("li");
+      item.textContent = `… (${total - records.length} more)`;
+      list.append(item);
+    }
+  }
+
+  function init(container) {
+    const input = document.createElement("input");
+    input.type = "search";
+    input.placeholder = "Search theorems";
+    input.setAttribute("aria-label", "Search theorems");
+    const list = document.createElement("ul");
+    list.className = "proof-search-results";
+    container.append(input, list);
+
+    let timeout = null;
+    let latest = null;
+    input.addEventListener("input", function () {
+      clearTimeout(timeout);
+      timeout = setTimeout(function () {
+        const query = input.value;
+        latest = query;
+        search(query)
+          .then(function (indexes) {
+            return getRecords(indexes.slice(0, MAX_RESULTS)).then(function (records) {
+              // Ignore results of outdated queries
+              if (query === latest) {
+                render(list, records, indexes.length);
+              }
+            });
+          })
+          .catch(function (error) {
+            list.textContent = `Error while searching (${error.message}).`;
+          });
+      }, 150);
+    });
+  }
+
+  function initAll() {
+    document.querySelectorAll(".proof-search").forEach(init);
+  }
+
+  if (document.readyState === "loading") {
+    document.addEventListener("DOMContentLoaded", initAll);
+  } else {
+    initAll();
+  }
+})();
@@ -1,8 +1,112 @@
-  $(document).ready(function() {
-      $(".proof-type-proof > *").hide();
-      $(".proof-type-proof .proof-title").show();
-      $(".proof-type-proof .proof-title").click(function() {
-          $(this).parent().children().not(".proof-title").toggle(400);
-          $(this).parent().children(".proof-title").toggleClass("open");
+/* Collapse proofs: their content is hidden until their title is clicked.
+ *
+ * Proofs are hidden by CSS (see proof.css) as soon as class "proof-js" is set
+ * on the root element, that is, before the page is rendered. Clicking a title
+ * toggles its class "open", which shows the proof content.
+ *
+ * No work is done for each proof when the page is loaded: a single click
+ * listener handles every proof title.
+ *
+ * Proofs whose content is loaded lazily (see option proof_html_lazy_types)
+ * have an empty content element, whose "data-proof-src" attribute is the URL
+ * of a JSON file (mapping statement ids to HTML), followed by the statement
+ * id. It is fetched the first time the proof is opened.
+ */
+(function () {
+  "use strict";
+
+  document.documentElement.classList.add("proof-js");
+
+  const reducedMotion = window.matchMedia
+    ? window.matchMedia("(prefers-reduced-motion: reduce)")
+    : { matches: true };
+
+  // Map URLs of JSON files to promises of their content
+  const fragments = new Map();
+
+  function fetchFragments(url) {
+    if (!fragments.has(url)) {
+      fragments.set(
+        url,
+        fetch(url).then(function (response) {
+          if (!response.ok) {
+            throw new Error(response.status + " " + response.statusText);
+          }
+          return response.json();
+        })
+      );
+    }
+    return fragments.get(url);
+  }
+
+  function typeset(element) {
+    if (!window.MathJax) {
+      return;
+    }
+    if (window.MathJax.typesetPromise) {
+      window.MathJax.typesetPromise([element]);
+    } else if (window.MathJax.Hub) {
+      window.MathJax.Hub.Queue(["Typeset", window.MathJax.Hub, element]);
+    }
+  }
+
+  function loadContent(element) {
+    const source = element.dataset.proofSrc;
+    const [url, id] = source.split("#");
+    delete element.dataset.proofSrc;
+    element.classList.add("proof-loading");
+    fetchFragments(url)
+      .then(function (contents) {
+        if (!Object.prototype.hasOwnProperty.call(contents, id)) {
+          // Stale file, or statement excluded from it
+          throw new Error("content not found");
+        }
+        element.innerHTML = contents[id];
+        typeset(element);
       })
+      .catch(function (error) {
+        // Try again next time the proof is opened
+        fragments.delete(url);
+        element.dataset.proofSrc = source;
+        element.textContent = "Error while loading proof (" + error.message + ").";
+      })
+      .finally(function () {
+        element.classList.remove("proof-loading");
+      });
+  }
+
+  function animateOpening(title) {
+    if (reducedMotion.matches) {
+      return;
+    }
+    for (let sibling = title.nextElementSibling; sibling; sibling = sibling.nextElementSibling) {
+      if (sibling.animate) {
+        sibling.animate(
+          [
+            { opacity: 0, transform: "translateY(-0.5em)" },
+            { opacity: 1, transform: "none" },
+          ],
+          { duration: 400, easing: "ease-out" }
+        );
+      }
+    }
+  }
+
+  document.addEventListener("click", function (event) {
+    if (!(event.target instanceof Element)) {
+      return;
+    }
+    const title = event.target.closest(".proof-type-proof > .proof-title");
+    if (title === null || event.target.closest("a")) {
+      return;
+    }
+    if (title.classList.toggle("open")) {
+      for (let sibling = title.nextElementSibling; sibling; sibling = sibling.nextElementSibling) {
+        if (sibling.dataset.proofSrc) {
+          loadContent(sibling);
+        }
+      }
+      animateOpening(title);
+    }
   });
+})();
@@ -15,22 +15,42 @@
 
 """Provide tools to typeset theorems, proofs, etc. in Sphinx documentation."""
 
-import logging
+# pylint: disable=too-many-lines
+
+import collections
+import json
 import os
+import sys
 
-import jinja2
 from docutils import nodes
-from docutils.nodes import make_id
-from docutils.parsers.rst import directives
-from docutils.statemachine import ViewList
-from sphinx.domains import ObjType
-from sphinx.domains.std import StandardDomain
+from sphinx import addnodes
+from sphinx.domains import Domain, ObjType
 from sphinx.roles import XRefRole
+from sphinx.util import logging
 from sphinx.util.docutils import SphinxDirective
-from sphinx.util.nodes import clean_astext, make_refnode, set_source_info
+from sphinx.util.nodes import clean_astext
+from sphinx.util.osutil import ensuredir, relative_uri
+
+from . import (
+    cache,
+    check,
+    dependencies,
+    includes,
+    inventory,
+    lists,
+    numbering,
+    pages,
+    pickling,
+    previews,
+    profiling,
+    search,
+    tags,
+)
 
 VERSION = "1.7.1"
 
+LOGGER = logging.getLogger(__name__)
+
 ################################################################################
 # Configuration
 PROOF_THEOREM_TYPES = {
@@ -48,6 +68,12 @@ PROOF_THEOREM_TYPES = {
 
 PROOF_HTML_NONUMBERS = ["proof"]
 
+PROOF_CACHE_SIZE = 100 * 2**20  # bytes
+
+# Builders able to load statement content lazily (see proof_html_lazy_types)
+LAZY_BUILDERS = ["html", "dirhtml", "singlehtml"]
+LAZY_DIRECTORY = "_proof/lazy"
+
 PROOF_HTML_TITLE_TEMPLATE_VISIT = """
     <div class="proof-title">
         <span class="proof-type">{{ thmtype }} {% if number %}{{number}}{% endif %}</span>
@@ -60,6 +86,9 @@ PROOF_HTML_TITLE_TEMPLATE_DEPART = """
         {%- if title -%}
             )</span>
         {% endif %}
+        {%- if tag %}
+        <a class="proof-tag" href="{{ tag_uri }}">{{ tag }}</a>
+        {%- endif %}
     </div>
 """
 
@@ -76,7 +105,7 @@ def title_getter(node):
     return ""
 
 
-class _StatementNode(nodes.General, nodes.Element):
+class _StatementNode(pickling.CompactElement, nodes.General, nodes.Element):
     """Statement"""
 
 
@@ -91,15 +120,15 @@ class UnnumberedStatementNode(_StatementNode):
     """
 
 
-class _TitleNode(nodes.TextElement):
+class _TitleNode(pickling.CompactElement, nodes.TextElement):
     """Title of a statement"""
 
 
-class _EmptyTitleNode(nodes.TextElement):
+class _EmptyTitleNode(pickling.CompactElement, nodes.TextElement):
     """Dummy node for statements without any title."""
 
 
-class ContentNode(nodes.General, nodes.Element):
+class ContentNode(pickling.CompactElement, nodes.General, nodes.Element):
     """Content of a proof or a statement"""
 
 
@@ -119,12 +148,19 @@ class StatementEnvironment(SphinxDirective):
         """Render this environment"""
         env = self.state.document.settings.env
 
-        thmtype = self.name[len("proof:") :]
+        thmtype = sys.intern(self.name[len("proof:") :])
+        # The raw source is not needed once the content has been parsed: it is
+        # dropped (unless asked otherwise) to keep doctrees small.
+        if env.config.proof_keep_rawsource:
+            rawsource = "\n".join(self.content)
+        else:
+            rawsource = ""
         if thmtype in env.config.proof_html_nonumbers:
-            node = UnnumberedStatementNode("\n".join(self.content))
+            node = UnnumberedStatementNode(rawsource)
         else:
-            node = NumberedStatementNode("\n".join(self.content))
+            node = NumberedStatementNode(rawsource)
         node["thmtype"] = thmtype
+        self.set_source_info(node)
         if self.arguments:
             titletext = self.arguments[0]
             titlenodes, messages = self.state.inline_text(titletext, self.lineno)
@@ -136,94 +172,906 @@ class StatementEnvironment(SphinxDirective):
             messages = []
 
         content = ContentNode()
-        self.state.nested_parse(self.content, self.content_offset, content)
+        self.parse_content(content)
         content["classes"] += ["proof-content"]
         node += content
 
         self.add_name(node)
         return [node] + messages
 
+    def parse_content(self, node):
+        """Parse the content of this environment into `node`."""
+        if self.config.proof_cache:
+            cache.parse_content(self, node)
+        else:
+            self.state.nested_parse(self.content, self.content_offset, node)
+
+
+Statement = collections.namedtuple(
+    "Statement",
+    ["docname", "node_id", "thmtype", "title", "number", "labels", "dependencies"],
+)
+Statement.__doc__ = """Entry of the statement index of :class:`ProofDomain`.
+
+- ``docname``: document defining the statement;
+- ``node_id``: first id of the statement node;
+- ``thmtype``: statement type (e.g. ``"theorem"``);
+- ``title``: statement title (or ``""``);
+- ``number``: statement number (tuple of integers), or ``None`` if unnumbered;
+- ``labels``: labels of the statement;
+- ``dependencies``: labels referenced in the content of the statement (but
+  not in the content of statements nested in it).
+"""
+
+
+def _get_line(node):
+    """Return the line of `node`, or of its closest ancestor having one.
+
+    Return ``None`` if none of them has a line.
+    """
+    while node is not None and not node.line:
+        node = node.parent
+    return None if node is None else node.line
+
+
+def _get_enclosing_statement(node, content_only=False):
+    """Return the innermost statement containing `node` (or ``None``).
+
+    If `content_only` is true, only consider statements whose content (and
+    not title) contains `node`.
+    """
+    child, parent = node, node.parent
+    while parent is not None:
+        if isinstance(parent, _StatementNode):
+            if content_only and not isinstance(child, ContentNode):
+                return None
+            return parent
+        child, parent = parent, parent.parent
+    return None
+
+
+class ProofDomain(Domain):
+    """Proof domain
+
+    Statements are stored in a compact index:
+
+    - ``statements`` maps document names to dictionaries mapping node ids to
+      :class:`Statement`;
+    - ``labels`` maps labels to ``(docname, node_id, labelid)``;
+    - ``references`` maps document names to the set of labels they reference;
+    - ``targets`` maps labels to what references to them display (document,
+      anchor, type, title, number), as of the end of the last read phase;
+    - ``dependency_lists`` maps document names to the ``proof:dependencies``
+      directives they contain (as ``(label, node_id, direct)``);
+    - ``statement_lists`` maps document names to the ``proof:list``
+      directives they contain (as ``(types, subtree)``);
+    - ``list_snapshots`` maps document names to what their
+      ``proof:dependencies`` and ``proof:list`` directives displayed, as of
+      the end of the last read phase;
+    - ``summaries`` maps document names to dictionaries mapping node ids to
+      the first sentence of statements (only if ``proof_html_search`` is set);
+    - ``includes`` maps document names to the labels of the statements they
+      include (using ``proof:include``);
+    - ``include_snapshots`` maps document names to the statements they
+      include, as of the end of the last read phase;
+    - ``unknown_types`` maps document names to the unknown ``proof:``
+      directives they contain, as ``(name, line)`` (see
+      :class:`sphinxcontrib.proof.check.UnknownTypeDirective`);
+    - ``lines`` maps document names to the lines of their statements (as a
+      dictionary mapping node ids to lines), and to the line of the first
+      reference to each label (by roles, ``proof:include`` or
+      ``proof:dependencies``, as a dictionary mapping labels to lines), used
+      to report problems (see :mod:`sphinxcontrib.proof.check`);
+    - ``sections`` maps document names to dictionaries mapping node ids to
+      the anchors of the sections containing statements, and ``numbering``
+      and ``numbering_settings`` cache their numbering (only if
+      ``proof_html_numbering`` is ``"proof"``, see
+      :mod:`sphinxcontrib.proof.numbering`).
+
+    Only statements are stored, so that the size of this data (and the cost of
+    clearing a document) only depends on the number of statements.
+
+    The dependency graph is made of statements (as ``(docname, node_id)``)
+    and of the labels they reference (see :attr:`Statement.dependencies`).
+    Its transitive closure, as well as statement lists, are computed when
+    needed, and memoized until documents are read again (they are not stored
+    in the environment).
+    """
 
-class ProofDomain(StandardDomain):
-    """Proof domain"""
+    # pylint: disable=too-many-public-methods
 
     name = "proof"
     label = "Proof"
 
+    object_types = {"statement": ObjType("statement", "ref", "numref")}
+    directives = {
+        "dependencies": dependencies.DependenciesDirective,
+        "include": includes.IncludeDirective,
+        "list": lists.StatementListDirective,
+    }
+    roles = {
+        "ref": XRefRole(
+            lowercase=True, innernodeclass=nodes.inline, warn_dangling=True
+        ),
+        "numref": XRefRole(lowercase=True, warn_dangling=True),
+    }
+    initial_data = {
+        "statements": {},  # docname -> node_id -> Statement
+        "labels": {},  # label -> docname, node_id, labelid
+        "references": {},  # docname -> frozenset of labels
+        "targets": {},  # label -> docname, labelid, thmtype, title, number
+        "dependency_lists": {},  # docname -> tuple of (label, node_id, direct)
+        "statement_lists": {},  # docname -> tuple of (types, subtree)
+        "list_snapshots": {},  # docname -> tuple of statements
+        "summaries": {},  # docname -> node_id -> first sentence
+        "includes": {},  # docname -> tuple of labels
+        "include_snapshots": {},  # docname -> tuple of (label, Statement)
+        "unknown_types": {},  # docname -> list of (directive name, line)
+        "lines": {},  # docname -> (node_id -> line, label -> line)
+        "sections": {},  # docname -> node_id -> tuple of section anchors
+        "numbering": {},  # docname -> local numbering of the document
+        "numbering_settings": None,
+    }
+    reference_roles = {
+        ("proof", "ref"),
+        ("proof", "numref"),
+        ("std", "ref"),
+        ("std", "numref"),
+    }
+    dangling_warnings = {
+        "ref": "undefined label: %(target)r",
+        "numref": "undefined label: %(target)r",
+    }
+
+    def __init__(self, env):
+        super().__init__(env)
+        # Memoized transitive dependencies: (docname, node_id) -> frozenset
+        self._closures = {}
+        # Memoized positions of statements in their document
+        self._positions = {}
+        # Memoized statement lists: (types, subtree) -> tuple of statements
+        self._lists = {}
+        # Memoized statement nodes, as read from doctrees: label -> node
+        self._nodes = {}
+        # Documents read since the last call to get_outdated_includes()
+        self._read = set()
+        # Tag database, read once per build (see tags.get_database())
+        self.tag_database = None
+
+    @property
+    def statements(self):
+        """Dictionary mapping document names to their statements."""
+        return self.data["statements"]
+
+    @property
+    def labels(self):
+        """Dictionary mapping labels to ``(docname, node_id, labelid)``."""
+        return self.data["labels"]
+
+    @property
+    def references(self):
+        """Dictionary mapping document names to the labels they reference."""
+        return self.data["references"]
+
+    @property
+    def dependency_lists(self):
+        """Dictionary mapping document names to their dependency lists."""
+        return self.data["dependency_lists"]
+
+    def get_statement(self, label):
+        """Return the :class:`Statement` labelled `label` (or ``None``)."""
+        try:
+            docname, node_id, _labelid = self.labels[label]
+        except KeyError:
+            return None
+        return self.statements[docname][node_id]
+
+    def directive(self, name):
+        """Return the directive `name`.
+
+        Unknown directives explicitly prefixed by ``proof:`` are recorded (see
+        :class:`sphinxcontrib.proof.check.UnknownTypeDirective`).
+        """
+        directive = super().directive(name)
+        if directive is not None:
+            return directive
+        if hasattr(self.env, "current_document"):  # Sphinx >= 8.2
+            default_domain = self.env.current_document.default_domain
+        else:
+            default_domain = self.env.temp_data.get("default_domain")
+        if default_domain is self:
+            # Name may not be prefixed: it may be a directive of another domain
+            return None
+        return check.UnknownTypeDirective
+
+    def clear_doc(self, docname):
+        self._closures, self._positions, self._lists, self._nodes = {}, {}, {}, {}
+        self.data["includes"].pop(docname, None)
+        self.data["include_snapshots"].pop(docname, None)
+        self.data["unknown_types"].pop(docname, None)
+        self.data["lines"].pop(docname, None)
+        self.data["sections"].pop(docname, None)
+        self.data["numbering"].pop(docname, None)
+        self.references.pop(docname, None)
+        self.dependency_lists.pop(docname, None)
+        self.data["statement_lists"].pop(docname, None)
+        self.data["list_snapshots"].pop(docname, None)
+        self.data["summaries"].pop(docname, None)
+        for statement in self.statements.pop(docname, {}).values():
+            for label in statement.labels:
+                if self.labels.get(label, ("",))[0] == docname:
+                    del self.labels[label]
+
+    def merge_domaindata(self, docnames, otherdata):
+        self._closures, self._positions, self._lists, self._nodes = {}, {}, {}, {}
+        self._read.update(docnames)
+        for docname in docnames:
+            if docname in otherdata["includes"]:
+                self.data["includes"][docname] = otherdata["includes"][docname]
+            if docname in otherdata["unknown_types"]:
+                self.data["unknown_types"][docname] = otherdata["unknown_types"][
+                    docname
+                ]
+            if docname in otherdata["lines"]:
+                self.data["lines"][docname] = otherdata["lines"][docname]
+            if docname in otherdata["sections"]:
+                self.data["sections"][docname] = otherdata["sections"][docname]
+            if docname in otherdata["references"]:
+                self.references[docname] = otherdata["references"][docname]
+            if docname in otherdata["dependency_lists"]:
+                self.dependency_lists[docname] = otherdata["dependency_lists"][docname]
+            if docname in otherdata["statement_lists"]:
+                self.data["statement_lists"][docname] = otherdata["statement_lists"][
+                    docname
+                ]
+            if docname in otherdata["summaries"]:
+                self.data["summaries"][docname] = otherdata["summaries"][docname]
+            if docname not in otherdata["statements"]:
+                continue
+            self.statements[docname] = otherdata["statements"][docname]
+            for statement in self.statements[docname].values():
+                for label in statement.labels:
+                    self.labels[label] = otherdata["labels"][label]
+
+    def process_doc(self, env, docname, document):
+        statement_nodes = list(document.findall(_StatementNode))
+        for node in statement_nodes:
+            if not node["ids"]:
+                document.set_id(node)
+
+        references = set()
+        reference_lines = {}
+        edges = collections.defaultdict(dict)
+        for node in document.findall(addnodes.pending_xref):
+            if (node.get("refdomain"), node.get("reftype")) not in self.reference_roles:
+                continue
+            # Interned, so that labels are shared by the pickled environment
+            target = sys.intern(node["reftarget"])
+            references.add(target)
+            reference_lines.setdefault(target, _get_line(node))
+            statement = _get_enclosing_statement(node, content_only=True)
+            if statement is not None:
+                edges[statement["ids"][0]][target] = None
+        if references:
+            self.references[docname] = frozenset(references)
+
+        statements = pickling.StatementTable()
+        for node in statement_nodes:
+            labels = tuple(
+                sys.intern(name) for name in node["names"] if name in document.nameids
+            )
+            statement = Statement(
+                docname=docname,
+                node_id=node["ids"][0],
+                thmtype=sys.intern(node["thmtype"]),
+                title=title_getter(node),
+                number=None,
+                labels=labels,
+                dependencies=tuple(edges.get(node["ids"][0], ())),
+            )
+            statements[statement.node_id] = statement
+            for label in labels:
+                self.labels[label] = (
+                    docname,
+                    statement.node_id,
+                    document.nameids[label],
+                )
+        if statements:
+            self.statements[docname] = statements
+
+        self._process_statement_nodes(docname, document, statement_nodes)
+        self._process_dependency_lists(docname, document)
+        self._process_lines(docname, document, statement_nodes, reference_lines)
+        queries = tuple(
+            (node["types"], node["subtree"])
+            for node in document.findall(lists.StatementListNode)
+        )
+        if queries:
+            self.data["statement_lists"][docname] = queries
+        labels = tuple(node["label"] for node in document.findall(includes.IncludeNode))
+        if labels:
+            self.data["includes"][docname] = labels
+        self._read.add(docname)
+        self._closures, self._positions, self._lists, self._nodes = {}, {}, {}, {}
+
+    def _process_statement_nodes(self, docname, document, statement_nodes):
+        """Record the sections and summaries of statements (if needed)."""
+        if not statement_nodes:
+            return
+        if self.env.config.proof_html_numbering == "proof":
+            first = document.next_node(nodes.section)
+            self.data["sections"][docname] = {
+                node["ids"][0]: numbering.get_section_anchors(node, first)
+                for node in statement_nodes
+            }
+        if self.env.config.proof_html_search:
+            self.data["summaries"][docname] = {
+                node["ids"][0]: search.summarize(node.next_node(ContentNode))
+                for node in statement_nodes
+            }
+
+    def _process_lines(self, docname, document, statement_nodes, reference_lines):
+        """Record the lines of statements, and of references to labels."""
+        for node in document.findall(includes.IncludeNode):
+            reference_lines.setdefault(node["label"], _get_line(node))
+        for node in document.findall(dependencies.DependenciesNode):
+            if node["label"] is not None:
+                reference_lines.setdefault(node["label"], _get_line(node))
+        statement_lines = {node["ids"][0]: _get_line(node) for node in statement_nodes}
+        if statement_lines or reference_lines:
+            self.data["lines"][docname] = (statement_lines, reference_lines)
+
+    def _process_dependency_lists(self, docname, document):
+        """Record the ``proof:dependencies`` directives of `document`."""
+        queries = []
+        for node in document.findall(dependencies.DependenciesNode):
+            node["docname"] = docname
+            if node["label"] is None:
+                statement = _get_enclosing_statement(node)
+                if statement is None:
+                    LOGGER.warning(
+                        "proof:dependencies without argument is only allowed "
+                        "inside a statement",
+                        location=node,
+                    )
+                    continue
+                node["node_id"] = statement["ids"][0]
+            queries.append((node["label"], node.get("node_id"), node["direct"]))
+        if queries:
+            self.dependency_lists[docname] = tuple(queries)
+
+    def assign_numbers(self):
+        """Copy statement numbers (computed by Sphinx) into the index.
+
+        If ``proof_html_numbering`` is ``"proof"``, statements are numbered by
+        :func:`sphinxcontrib.proof.numbering.assign` instead.
+
+        Return the set of documents in which a statement number changed.
+        """
+        if self.env.config.proof_html_numbering == "proof":
+            return numbering.assign(self, lists.get_documents(self.env))
+        outdated = set()
+        for docname, statements in self.statements.items():
+            fignumbers = self.env.toc_fignumbers.get(docname, {}).get("proof", {})
+            for node_id, statement in statements.items():
+                number = fignumbers.get(node_id)
+                if number != statement.number:
+                    statements[node_id] = statement._replace(number=number)
+                    outdated.add(docname)
+        return outdated
+
+    def resolve_numbers(self, doctree, docname):
+        """Store the number of each statement of `doctree`, as a string.
+
+        Numbers are stored as attribute ``number`` of statement nodes, so that
+        translators do not have to look them up. When several documents are
+        assembled into `doctree` (singlehtml, LaTeX), statements are looked up
+        in the document they come from (recorded as attribute ``docname`` of
+        sections and :class:`sphinx.addnodes.start_of_file` nodes). Copies of
+        statements (see ``proof:include``) are looked up using their
+        ``included_from`` attribute.
+
+        The permanent tag of statements (if any) is stored as attribute
+        ``tag``.
+        """
+        database = tags.get_database(self.env)
+        for node in doctree.findall(_StatementNode):
+            source, node_id = docname, node["ids"][0]
+            parent = node.parent
+            while parent is not None:
+                if "docname" in parent:
+                    source = parent["docname"]
+                    break
+                parent = parent.parent
+            if "included_from" in node:
+                source, node_id = node["included_from"]
+            statement = self.statements.get(source, {}).get(node_id)
+            if statement is None or statement.number is None:
+                node["number"] = ""
+            else:
+                node["number"] = ".".join(map(str, statement.number))
+            if database is not None and statement is not None and statement.labels:
+                node["tag"] = database.tags.get(statement.labels[0], "")
+
+    def get_outdated_referrers(self):
+        """Return the documents whose references to statements are outdated.
+
+        That is, documents referencing a statement which has been moved,
+        removed, renamed or renumbered since the last call to this method.
+        """
+        targets = {}
+        for label, (docname, node_id, labelid) in self.labels.items():
+            statement = self.statements[docname][node_id]
+            targets[label] = (
+                docname,
+                labelid,
+                statement.thmtype,
+                statement.title,
+                statement.number,
+            )
+        previous, self.data["targets"] = self.data["targets"], targets
+
+        changed = {
+            label
+            for label in targets.keys() | previous.keys()
+            if targets.get(label) != previous.get(label)
+        }
+        if not changed:
+            return set()
+        return {
+            docname
+            for docname, labels in self.references.items()
+            if not labels.isdisjoint(changed)
+        }
+
+    def get_successors(self, key):
+        """Return the statements directly referenced by statement `key`."""
+        docname, node_id = key
+        successors = {}
+        for label in self.statements[docname][node_id].dependencies:
+            if label in self.labels:
+                successors[self.labels[label][:2]] = None
+        return successors
+
+    def get_dependencies(self, key, direct=False):
+        """Return the statements statement `key` relies on.
+
+        Statements are ``(docname, node_id)`` tuples. Direct dependencies come
+        first (in the order they are referenced), followed (unless `direct` is
+        true) by indirect dependencies (in document order).
+        """
+        successors = [
+            successor for successor in self.get_successors(key) if successor != key
+        ]
+        if direct:
+            return successors
+        if key not in self._closures:
+            dependencies.compute_closures(key, self.get_successors, self._closures)
+        indirect = self._closures[key] - set(successors) - {key}
+        if not self._positions:
+            self._positions = {
+                (docname, node_id): position
+                for docname, statements in self.statements.items()
+                for position, node_id in enumerate(statements)
+            }
+        return successors + sorted(
+            indirect, key=lambda item: (item[0], self._positions[item])
+        )
 
-################################################################################
-# HTML
+    def get_statement_list(self, types=None, subtree=None):
+        """Return the statements of a ``proof:list`` directive.
+
+        :param types: Theorem types to list (``None`` means every type).
+        :param subtree: Only list statements of the toctree of this document
+            (``None`` means every document).
+
+        Statements are ``(docname, node_id)`` tuples, in document order. Lists
+        with the same filters share the same (memoized) result.
+        """
+        if (types, subtree) not in self._lists:
+            self._lists[types, subtree] = tuple(
+                (docname, node_id)
+                for docname in lists.get_documents(self.env, subtree)
+                for node_id, statement in self.statements.get(docname, {}).items()
+                if types is None or statement.thmtype in types
+            )
+        return self._lists[types, subtree]
+
+    def get_statement_node(self, label):
+        """Return the node of the statement labelled `label`.
+
+        The node is read from the doctree of its document (references are not
+        resolved), and memoized until documents are read again.
+        """
+        if label not in self._nodes:
+            docname, node_id, _labelid = self.labels[label]
+            for node in self.env.get_doctree(docname).findall(_StatementNode):
+                if node["ids"][0] == node_id:
+                    self._nodes[label] = node
+                    break
+        return self._nodes[label]
+
+    def get_outdated_includes(self):
+        """Return the documents including (``proof:include``) a statement which changed.
+
+        That is, a statement whose document has been read since the last call
+        to this method, or which has been renamed, renumbered, moved or
+        removed.
+        """
+        snapshots = self.data["include_snapshots"]
+        outdated = set()
+        for docname, labels in self.data["includes"].items():
+            snapshot = tuple((label, self.get_statement(label)) for label in labels)
+            if snapshots.get(docname) != snapshot or any(
+                statement is not None and statement.docname in self._read
+                for _label, statement in snapshot
+            ):
+                snapshots[docname] = snapshot
+                outdated.add(docname)
+        self._read = set()
+        return outdated
+
+    def get_outdated_lists(self):
+        """Return the documents whose ``proof:dependencies`` or ``proof:list`` changed.
+
+        That is, lists which would display different statements, or
+        statements with a different type, title, number, or anchor.
+        """
+        snapshots = self.data["list_snapshots"]
+        outdated = set()
+        statement_lists = self.data["statement_lists"]
+        for docname in self.dependency_lists.keys() | statement_lists.keys():
+            keys = []
+            for query in self.dependency_lists.get(docname, ()):
+                key = dependencies.get_key(self, docname, query)
+                if key is not None:
+                    keys.extend(self.get_dependencies(key, query[2]))
+            for types, subtree in statement_lists.get(docname, ()):
+                keys.extend(self.get_statement_list(types, subtree))
+            snapshot = tuple(
+                (
+                    key,
+                    statement.thmtype,
+                    statement.title,
+                    statement.number,
+                    statement.labels,
+                )
+                for key, statement in (
+                    (key, self.statements[key[0]][key[1]]) for key in keys
+                )
+            )
+            if snapshots.get(docname) != snapshot:
+                snapshots[docname] = snapshot
+                outdated.add(docname)
+        return outdated
+
+    def resolve_xref(
+        self, env, fromdocname, builder, typ, target, node, contnode
+    ):  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        statement = self.get_statement(target)
+        if statement is None:
+            return None
+        if typ == "numref":
+            title = self._numref_title(statement, node, contnode)
+            if title is None:
+                return contnode
+            refnode = addnodes.number_reference("", "", internal=True, title=title)
+            text = self._numref_text(statement, title, node)
+            if text is None:
+                return contnode
+        else:
+            refnode = nodes.reference("", "", internal=True)
+            text = self._ref_text(
+                node,
+                contnode,
+                statement.title,
+                self.env.config.proof_theorem_types[statement.thmtype],
+                statement.number,
+            )
+        docname, _node_id, labelid = self.labels[target]
+        return self._fill_reference_node(
+            builder, fromdocname, (docname, labelid), refnode, text
+        )
 
+    def resolve_any_xref(
+        self, env, fromdocname, builder, target, node, contnode
+    ):  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        """Labels of statements are standard labels as well.
+
+        Let the standard domain resolve them, to avoid ambiguous references.
+        """
+        return []
+
+    @classmethod
+    def _ref_text(cls, node, contnode, title, typename, number):
+        """Return the text of a ``:proof:ref:`` reference to a statement."""
+        if node["refexplicit"]:
+            return contnode.astext()
+        return cls.statement_name(title, typename, number)
+
+    @staticmethod
+    def statement_name(title, typename, number):
+        """Return the title of a statement, or its type (and number)."""
+        if title:
+            return title
+        if number:
+            return f"{typename} {'.'.join(map(str, number))}"
+        return typename
+
+    def _numref_title(self, statement, node, contnode):
+        """Return the format of a ``:proof:numref:`` reference to `statement`.
+
+        Return ``None`` (and log a warning) if `statement` cannot be referenced
+        by number.
+        """
+        if (
+            self.env.config.numfig is False
+            and self.env.config.proof_html_numbering != "proof"
+        ):
+            LOGGER.warning("numfig is disabled. :numref: is ignored.", location=node)
+            return None
+        if statement.number is None:
+            LOGGER.warning(
+                "Failed to create a cross reference. Any number is not assigned: %s",
+                node["reftarget"],
+                location=node,
+            )
+            return None
+        if node["refexplicit"]:
+            return contnode.astext()
+        return self.env.config.numfig_format.get("proof", "")
+
+    @staticmethod
+    def _numref_text(statement, title, node):
+        """Return the text of a ``:proof:numref:`` reference to `statement`.
+
+        Copied from the sphinx project:
+        sphinx.domains.std.StandardDomain._resolve_numref_xref()
+        """
+        number = ".".join(map(str, statement.number))
+        try:
+            if "{name}" in title or "number" in title:
+                if not statement.title and "{name}" in title:
+                    LOGGER.warning("the link has no caption: %s", title, location=node)
+                    return None
+                return title.format(name=statement.title, number=number)
+            return title % number
+        except (KeyError, IndexError, TypeError, ValueError):
+            LOGGER.warning("invalid numfig_format: %s", title, location=node)
+            return None
+
+    @staticmethod
+    def _fill_reference_node(builder, fromdocname, target, refnode, text):
+        """Make `refnode` a reference to `target`, as ``(docname, anchor)``."""
+        docname, anchor = target
+        if docname == fromdocname:
+            refnode["refid"] = anchor
+        else:
+            refnode["refuri"] = builder.get_relative_uri(fromdocname, docname)
+            refnode["refuri"] += "#" + anchor
+        role = "numref" if isinstance(refnode, addnodes.number_reference) else "ref"
+        refnode += nodes.inline(text, text, classes=["proof", f"proof-{role}"])
+        return refnode
+
+    def get_anchor(self, docname, node_id):
+        """Return the anchor of a statement: its first label, if any.
+
+        Unlike node ids, label anchors do not change when content is inserted
+        before the statement.
+        """
+        statement = self.statements[docname][node_id]
+        if statement.labels:
+            return self.labels[statement.labels[0]][2]
+        return node_id
+
+    def get_reference_node(self, builder, fromdocname, key, text):
+        """Return a reference to statement `key`, displaying `text`.
+
+        The statement is given as ``(docname, node_id)``. The anchor is its
+        first label, if any.
+        """
+        return self._fill_reference_node(
+            builder,
+            fromdocname,
+            (key[0], self.get_anchor(*key)),
+            nodes.reference("", "", internal=True),
+            text,
+        )
 
-def get_fignumber(writer, node):
-    """Compute and return the theorem number of `node`."""
-    # Copied from the sphinx project: sphinx.writers.html.HTMLTranslator.add_fignumber()
-    if not isinstance(node.parent, NumberedStatementNode):
-        return ""
-    figure_id = node.parent["ids"][0]
-    if writer.builder.name == "singlehtml":
-        key = f"{writer.docnames[-1]}/proof"
-    else:
-        key = "proof"
-    if figure_id in writer.builder.fignumbers.get(key, {}):
-        return ".".join(map(str, writer.builder.fignumbers[key][figure_id]))
-    return ""
+    def resolve_inventory_xref(self, typ, entry, node, contnode):
+        """Resolve a reference to `entry`, a statement of another project.
+
+        See :mod:`sphinxcontrib.proof.inventory`.
+        """
+        if typ == "numref":
+            title = self._numref_title(entry, node, contnode)
+            if title is None:
+                return contnode
+            refnode = addnodes.number_reference("", "", internal=False, title=title)
+            text = self._numref_text(entry, title, node)
+            if text is None:
+                return contnode
+        else:
+            refnode = nodes.reference("", "", internal=False)
+            text = self._ref_text(
+                node, contnode, entry.title, entry.typename, entry.number
+            )
+        refnode["refuri"] = entry.uri
+        refnode += nodes.inline(text, text, classes=["proof", f"proof-{typ}"])
+        return refnode
+
+    def get_objects(self):
+        for label, (docname, node_id, labelid) in self.labels.items():
+            statement = self.statements[docname][node_id]
+            yield (label, statement.title or label, "statement", docname, labelid, -1)
+
+
+################################################################################
+# HTML
 
 
 def html_visit_statement_node(self, node):
     """Enter :class:`_StatementNode` in HTML builder."""
-
+    self.__dict__.setdefault("proof_statement_starts", []).append(len(self.body))
     self.body.append(
         self.starttag(node, "div", CLASS=f"""proof proof-type-{node["thmtype"]}""")
     )
 
 
 def html_depart_statement_node(self, node):
-    """Leave :class:`_StatementNode` in HTML builder."""
-    # pylint: disable=unused-argument
+    """Leave :class:`_StatementNode` in HTML builder.
+
+    The HTML of the statement is given to the features using it (statement
+    pages and previews), if enabled.
+    """
     self.body.append("</div>")
+    start = self.proof_statement_starts.pop()
+    if pages.is_enabled(self.builder):
+        pages.store(
+            self,
+            node,
+            isinstance(node, NumberedStatementNode),
+            "".join(self.body[start:]),
+        )
+    if previews.is_enabled(self.builder):
+        previews.store(self, node, "".join(self.body[start:]))
 
 
-def html_visit_title_node(self, node):
-    """Enter :class:`_TitleNode` in HTML builder."""
+def _render_default_title_visit(thmtype, number, title, **kwargs):
+    """Render :data:`PROOF_HTML_TITLE_TEMPLATE_VISIT` without jinja2.
 
-    config = self.builder.env.config
-    thmtypes = config.proof_theorem_types
-    thmtype = node.parent["thmtype"]
+    Output is identical to the one of the jinja2 template.
+    """
+    # pylint: disable=unused-argument
+    html = (
+        '\n    <div class="proof-title">\n'
+        f"""        <span class="proof-type">{thmtype} {number if number else ""}</span>\n"""
+        "        "
+    )
+    if title:
+        html += '\n            <span class="proof-title-name">('
+    return html
 
-    self.body.append(
-        jinja2.Template(self.builder.config.proof_html_title_template_visit).render(
-            number=get_fignumber(self, node),
-            thmtype=thmtypes[thmtype],
-            title=isinstance(node, _TitleNode),
+
+def _render_default_title_depart(title, tag="", tag_uri="", **kwargs):
+    """Render :data:`PROOF_HTML_TITLE_TEMPLATE_DEPART` without jinja2.
+
+    Output is identical to the one of the jinja2 template.
+    """
+    # pylint: disable=unused-argument
+    html = ")</span>\n        " if title else ""
+    if tag:
+        html += f'\n        <a class="proof-tag" href="{tag_uri}">{tag}</a>'
+    return html + "\n    </div>"
+
+
+PRECOMPILED_TITLE_TEMPLATES = {
+    PROOF_HTML_TITLE_TEMPLATE_VISIT: _render_default_title_visit,
+    PROOF_HTML_TITLE_TEMPLATE_DEPART: _render_default_title_depart,
+}
+
+
+def compile_title_template(source):
+    """Return a function rendering template `source`.
+
+    Default templates are rendered by plain python functions; other templates
+    are compiled using jinja2 (which is only imported here, when needed).
+    """
+    if source in PRECOMPILED_TITLE_TEMPLATES:
+        return PRECOMPILED_TITLE_TEMPLATES[source]
+
+    import jinja2  # pylint: disable=import-outside-toplevel
+
+    return jinja2.Template(source).render
+
+
+def get_title_template(builder, source):
+    """Return the compiled template `source`, cached in `builder`.
+
+    The cache is keyed on the template source: if options
+    ``proof_html_title_template_visit`` or ``proof_html_title_template_depart``
+    change, the new templates are compiled.
+    """
+    templates = builder.__dict__.setdefault("proof_title_templates", {})
+    if source not in templates:
+        templates[source] = compile_title_template(source)
+    return templates[source]
+
+
+def _title_context(builder, node):
+    """Return the variables of title templates of `node` (a title node)."""
+    context = {
+        "number": node.parent.get("number", ""),
+        "thmtype": builder.env.config.proof_theorem_types[node.parent["thmtype"]],
+        "title": isinstance(node, _TitleNode),
+        "tag": "",
+        "tag_uri": "",
+    }
+    if node.parent.get("tag") and builder.name in tags.BUILDERS:
+        context["tag"] = node.parent["tag"]
+        context["tag_uri"] = tags.get_relative_uri(
+            builder, builder.current_docname, node.parent["tag"]
         )
+    return context
+
+
+def html_visit_title_node(self, node):
+    """Enter :class:`_TitleNode` in HTML builder."""
+    render = get_title_template(
+        self.builder, self.builder.config.proof_html_title_template_visit
     )
+    self.body.append(render(**_title_context(self.builder, node)))
 
 
 def html_depart_title_node(self, node):
     """Leave :class:`_TitleNode` in HTML builder."""
+    render = get_title_template(
+        self.builder, self.builder.config.proof_html_title_template_depart
+    )
+    self.body.append(render(**_title_context(self.builder, node)))
 
-    config = self.builder.env.config
-    thmtypes = config.proof_theorem_types
-    thmtype = node.parent["thmtype"]
 
-    self.body.append(
-        jinja2.Template(self.builder.config.proof_html_title_template_depart).render(
-            number=get_fignumber(self, node),
-            thmtype=thmtypes[thmtype],
-            title=isinstance(node, _TitleNode),
-        )
+def _is_lazy(writer, node):
+    """Return ``True`` iff `node` (a :class:`ContentNode`) is loaded lazily."""
+    return (
+        writer.builder.name in LAZY_BUILDERS
+        and node.parent["thmtype"] in writer.builder.config.proof_html_lazy_types
     )
 
 
 def html_visit_content_node(self, node):
-    """Enter :class:`ContentNode` in HTML builder."""
-    self.body.append(self.starttag(node, "div"))
+    """Enter :class:`ContentNode` in HTML builder.
+
+    If the content is loaded lazily (see ``proof_html_lazy_types``), it is
+    rendered as usual, then moved from the page to the fragments of the page
+    (see :func:`html_depart_content_node`): only an empty ``div`` remains,
+    whose ``data-proof-src`` attribute tells where the content is.
+    """
+    if not _is_lazy(self, node):
+        self.body.append(self.starttag(node, "div"))
+        return
+
+    docname = self.builder.current_docname
+    source = relative_uri(
+        self.builder.get_target_uri(docname), f"{LAZY_DIRECTORY}/{docname}.json"
+    )
+    self.body.append(
+        self.starttag(
+            node, "div", **{"data-proof-src": f"{source}#{node.parent['ids'][0]}"}
+        )
+    )
+    self.__dict__.setdefault("proof_lazy_starts", []).append(len(self.body))
 
 
 def html_depart_content_node(self, node):
     """Leave :class:`ContentNode` in HTML builder."""
-    # pylint: disable=unused-argument
+    if _is_lazy(self, node):
+        start = self.proof_lazy_starts.pop()
+        fragments = self.builder.__dict__.setdefault("proof_lazy_fragments", {})
+        fragments.setdefault(self.builder.current_docname, {})[
+            node.parent["ids"][0]
+        ] = "".join(self.body[start:])
+        del self.body[start:]
     self.body.append("</div>")
 
 
@@ -296,16 +1144,121 @@ def latex_preamble(config):
 # Setup
 
 
+# Visitors of each node, for each builder
+TRANSLATION_HANDLERS = {
+    NumberedStatementNode: {
+        "html": (html_visit_statement_node, html_depart_statement_node),
+        "singlehtml": (html_visit_statement_node, html_depart_statement_node),
+        "latex": (latex_visit_statement_node, latex_depart_statement_node),
+    },
+    UnnumberedStatementNode: {
+        "html": (html_visit_statement_node, html_depart_statement_node),
+        "singlehtml": (html_visit_statement_node, html_depart_statement_node),
+        "latex": (latex_visit_statement_node, latex_depart_statement_node),
+    },
+    ContentNode: {
+        "html": (html_visit_content_node, html_depart_content_node),
+        "singlehtml": (html_visit_content_node, html_depart_content_node),
+        "latex": (latex_visit_content_node, latex_depart_content_node),
+    },
+    _TitleNode: {
+        "html": (html_visit_title_node, html_depart_title_node),
+        "singlehtml": (html_visit_title_node, html_depart_title_node),
+        "latex": (latex_visit_title_node, latex_depart_title_node),
+    },
+    _EmptyTitleNode: {
+        "html": (html_visit_title_node, html_depart_title_node),
+        "singlehtml": (html_visit_title_node, html_depart_title_node),
+        "latex": (latex_visit_title_node, latex_depart_title_node),
+    },
+}
+
+
 def process_proof_theorem_types(app, config):
     """Hook called when builder has been inited."""
     # Create directives
+    directive = StatementEnvironment
+    if config.proof_profile:
+        directive = profiling.profile_directive(directive)
     for environment in config.proof_theorem_types:
-        app.add_directive_to_domain("proof", environment, StatementEnvironment)
+        app.add_directive_to_domain("proof", environment, directive)
 
-    # Generate LaTeX preamble
-    if "preamble" not in config.latex_elements:
-        config.latex_elements["preamble"] = ""
-    config.latex_elements["preamble"] += latex_preamble(config)
+
+def init_latex_preamble(app):
+    """Add theorem definitions to the LaTeX preamble.
+
+    The preamble is only computed for LaTeX builders. It is added to the
+    builder context (initialized from :confval:`latex_elements`), so that
+    configuration is left untouched, and is not added twice if configuration
+    is reused for another build.
+    """
+    if app.builder.format != "latex":
+        return
+    preamble = app.builder.context.get("preamble", "")
+    if preamble:
+        preamble += "\n"
+    app.builder.context["preamble"] = preamble + latex_preamble(app.config)
+
+
+def update_statements(app, env):
+    """Store statement numbers into the :class:`ProofDomain` index.
+
+    This is called after Sphinx has computed figure numbers. Return the
+    documents that have to be written again, because one of their statement
+    numbers changed, or because they reference (or include) a statement which
+    changed.
+    """
+    # pylint: disable=unused-argument
+    domain = env.get_domain("proof")
+    outdated = domain.assign_numbers()
+    outdated |= domain.get_outdated_referrers()
+    outdated |= domain.get_outdated_lists()
+    outdated |= domain.get_outdated_includes()
+    return sorted(outdated & env.found_docs)
+
+
+def resolve_statement_numbers(app, doctree, docname):
+    """Store statement numbers into the nodes of the document being written."""
+    app.env.get_domain("proof").resolve_numbers(doctree, docname)
+
+
+def write_lazy_fragments(app, pagename, templatename, context, doctree):
+    """Write the lazily loaded statement contents of page `pagename`.
+
+    Contents are written as a JSON object mapping statement ids to HTML.
+    """
+    # pylint: disable=unused-argument
+    fragments = app.builder.__dict__.get("proof_lazy_fragments", {}).pop(pagename, None)
+    if not fragments:
+        return
+    filename = os.path.join(app.outdir, LAZY_DIRECTORY, f"{pagename}.json")
+    ensuredir(os.path.dirname(filename))
+    with open(filename, mode="w", encoding="utf8") as file:
+        json.dump(fragments, file, ensure_ascii=False, separators=(",", ":"))
+
+
+def init_cache(app):
+    """Initialize the cache of parsed statements, if ``proof_cache`` is set."""
+    if app.config.proof_cache:
+        cache.init(app)
+
+
+def init_profiling(app, config):
+    """Measure time spent in this extension, if ``proof_profile`` is set."""
+    if config.proof_profile:
+        profiling.instrument(app, sys.modules[__name__])
+
+
+def init_search(app, config):
+    """Load the search widget, if ``proof_html_search`` is set."""
+    if config.proof_html_search:
+        app.add_js_file("proof-search.js")
+
+
+def init_previews(app, config):
+    """Load the preview script, if ``proof_html_previews`` is set."""
+    if config.proof_html_previews:
+        app.add_js_file("proof-preview.js")
 
 
 def init_numfig_format(app, config):
@@ -320,8 +1273,10 @@ def init_numfig_format(app, config):
 
 def setup(app):
     """Plugin setup"""
+    # pylint: disable=too-many-statements
 
     app.add_domain(ProofDomain)
+    app.add_builder(check.ProofCheckBuilder)
 
     app.add_css_file("proof.css")
     app.add_js_file("proof.js")
@@ -333,43 +1288,61 @@ def setup(app):
         "proof_html_title_template_depart", PROOF_HTML_TITLE_TEMPLATE_DEPART, "env"
     )
     app.add_config_value("proof_html_nonumbers", PROOF_HTML_NONUMBERS, "env")
+    app.add_config_value("proof_html_numbering", "numfig", "env")
+    app.add_config_value("proof_html_numbering_shared", True, "env")
+    app.add_config_value("proof_html_lazy_types", [], "html")
+    app.add_config_value("proof_html_previews", False, "html")
+    app.add_config_value("proof_html_search", False, "env")
+    app.add_config_value("proof_html_statement_pages", False, "html")
+    app.add_config_value("proof_html_statement_pages_proof", True, "html")
+    app.add_config_value("proof_inventories", {}, "env")
+    app.add_config_value("proof_keep_rawsource", False, "env")
     app.add_config_value("proof_latex_main", "theorem", "env")
     app.add_config_value("proof_latex_notheorem", [], "env")
     app.add_config_value("proof_latex_parent", None, "env")
+    app.add_config_value("proof_tags", False, "html")
+    app.add_config_value("proof_tags_file", "proof-tags.txt", "html")
     app.add_config_value("proof_theorem_types", PROOF_THEOREM_TYPES, "env")
 
-    app.add_enumerable_node(
-        NumberedStatementNode,
-        "proof",
-        title_getter,
-        html=(html_visit_statement_node, html_depart_statement_node),
-        singlehtml=(html_visit_statement_node, html_depart_statement_node),
-        latex=(latex_visit_statement_node, latex_depart_statement_node),
-    )
-    app.add_node(
-        UnnumberedStatementNode,
-        html=(html_visit_statement_node, html_depart_statement_node),
-        singlehtml=(html_visit_statement_node, html_depart_statement_node),
-        latex=(latex_visit_statement_node, latex_depart_statement_node),
-    )
-    app.add_node(
-        ContentNode,
-        html=(html_visit_content_node, html_depart_content_node),
-        singlehtml=(html_visit_content_node, html_depart_content_node),
-        latex=(latex_visit_content_node, latex_depart_content_node),
-    )
-    app.add_node(
-        _TitleNode,
-        html=(html_visit_title_node, html_depart_title_node),
-        singlehtml=(html_visit_title_node, html_depart_title_node),
-        latex=(latex_visit_title_node, latex_depart_title_node),
-    )
-    app.add_node(
-        _EmptyTitleNode,
-        html=(html_visit_title_node, html_depart_title_node),
-        singlehtml=(html_visit_title_node, html_depart_title_node),
-        latex=(latex_visit_title_node, latex_depart_title_node),
-    )
+    app.add_config_value("proof_cache", False, "")
+    app.add_config_value("proof_cache_dir", None, "")
+    app.add_config_value("proof_cache_size", PROOF_CACHE_SIZE, "")
+    app.add_config_value("proof_profile", False, "")
+
+    for node, handlers in TRANSLATION_HANDLERS.items():
+        if node is NumberedStatementNode:
+            app.add_enumerable_node(node, "proof", title_getter, **handlers)
+        else:
+            app.add_node(node, **handlers)
+    app.add_post_transform(includes.IncludeTransform)
 
+    app.connect("config-inited", init_profiling)
     app.connect("config-inited", process_proof_theorem_types)
     app.connect("config-inited", init_numfig_format)
+    app.connect("config-inited", init_search)
+    app.connect("config-inited", init_previews)
+    app.connect("builder-inited", init_cache)
+    app.connect("builder-inited", init_latex_preamble)
+    app.connect("env-get-updated", update_statements)
+    app.connect("env-get-updated", tags.allocate)
+    app.connect("doctree-resolved", resolve_statement_numbers)
+    app.connect("doctree-resolved", dependencies.resolve)
+    app.connect("doctree-resolved", lists.resolve)
+    app.connect("doctree-resolved", pages.record_written)
+    app.connect("html-page-context", write_lazy_fragments)
+    app.connect("html-page-context", pages.save)
+    app.connect("html-page-context", previews.save)
+    app.connect("html-collect-pages", pages.collect)
+    app.connect("missing-reference", inventory.missing_reference)
+    app.connect("build-finished", cache.evict)
+    app.connect("build-finished", check.report)
+    app.connect("build-finished", inventory.dump)
+    app.connect("build-finished", search.dump)
+    app.connect("build-finished", tags.write_pages)
+
+    return {
+        "version": VERSION,
+        "env_version": 10,
+        "parallel_read_safe": True,
+        "parallel_write_safe": True,
+    }
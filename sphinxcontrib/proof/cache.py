@@ -0,0 +1,252 @@
+# Copyright 2015-2025 Louis Paternault
+#
+# Sphinxcontrib-Proof is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sphinxcontrib-Proof is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Sphinxcontrib-Proof.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Cache parsed statement content across builds (see option ``proof_cache``).
+
+The content of a statement is parsed into docutils nodes, which are pickled
+into a cache directory, keyed by a hash of the statement source, its type,
+the relevant configuration, the roles in effect when it is parsed (see
+:func:`get_context`), and versions of Sphinx, docutils, and the loaded
+extensions. When the same statement is read again (in a later build, or in
+another project sharing the cache directory), nodes are unpickled instead of
+being parsed again.
+
+Rendering is not cached: numbers and cross-references are resolved, and
+nodes are rendered, at write time, as usual.
+
+Only self-contained content is cached: content made of simple nodes (see
+:data:`CACHEABLE_NODES`), without any label or id, that did not record any
+dependency (e.g. an ``include`` directive). Anything else (nested statements,
+footnotes, labels, warnings, etc.) is parsed at every build. In particular,
+content containing cross-references is never cached: pending references
+store the context in which they were parsed (current module or class, etc.),
+which may differ from one document to another.
+"""
+
+import hashlib
+import os
+import pickle
+import tempfile
+
+import docutils
+import sphinx
+from docutils import nodes
+from docutils.parsers.rst import roles
+from sphinx.util import logging
+
+LOGGER = logging.getLogger(__name__)
+
+# Nodes which may be cached
+CACHEABLE_NODES = (
+    nodes.Text,
+    nodes.admonition,
+    nodes.block_quote,
+    nodes.bullet_list,
+    nodes.comment,
+    nodes.definition,
+    nodes.definition_list,
+    nodes.definition_list_item,
+    nodes.emphasis,
+    nodes.enumerated_list,
+    nodes.hint,
+    nodes.inline,
+    nodes.line,
+    nodes.line_block,
+    nodes.list_item,
+    nodes.literal,
+    nodes.literal_block,
+    nodes.math,
+    nodes.math_block,
+    nodes.note,
+    nodes.paragraph,
+    nodes.reference,
+    nodes.strong,
+    nodes.subscript,
+    nodes.superscript,
+    nodes.term,
+    nodes.tip,
+    nodes.title_reference,
+    nodes.warning,
+)
+
+# Version of the cache, to be increased when cached content changes
+FORMAT = 2
+
+# Configuration values which may change the way statements are parsed
+CONFIG_VALUES = ["default_role", "language", "primary_domain"]
+
+# Attributes of cached nodes storing the name of the current document
+DOCNAME_ATTRIBUTES = ["docname"]
+
+
+def init(app):
+    """Compute the cache directory, and the part of keys common to all statements."""
+    config = app.config
+    salt = [
+        f"format {FORMAT}",
+        f"sphinx {sphinx.__version__}",
+        f"docutils {docutils.__version__}",
+    ]
+    for name in sorted(app.extensions):
+        salt.append(f"{name} {app.extensions[name].version}")
+    for name in sorted(CONFIG_VALUES):
+        salt.append(f"{name} {config[name]!r}")
+    for name in sorted(config.proof_theorem_types):
+        salt.append(f"type {name}")
+    for name in ("proof_html_nonumbers", "proof_keep_rawsource"):
+        salt.append(f"{name} {config[name]!r}")
+    app.env.proof_cache_salt = "\n".join(salt)
+
+    if config.proof_cache_dir:
+        app.env.proof_cache_dir = os.path.join(app.confdir, config.proof_cache_dir)
+    else:
+        app.env.proof_cache_dir = os.path.join(app.doctreedir, "proof-cache")
+
+
+def _describe_role(role):
+    """Return a description of `role`, which does not change from one build to another."""
+    if isinstance(role, roles.CustomRole):
+        return (
+            f"{_describe_role(role.base_role)}"
+            f"({role.supplied_options!r}, {role.supplied_content!r})"
+        )
+    return f"{role.__module__}.{getattr(role, '__qualname__', type(role).__qualname__)}"
+
+
+def get_context():
+    """Return the roles changing the way content is currently parsed.
+
+    That is: the default role (which may be set by the ``default-role``
+    directive), and the roles defined by the ``role`` directive.
+    """
+    context = []
+    # pylint: disable=protected-access
+    for name, role in sorted(roles._roles.items(), key=lambda item: item[0]):
+        if name == "" or isinstance(role, roles.CustomRole):
+            context.append(f"role {name!r} {_describe_role(role)}")
+    return context
+
+
+def get_path(directive):
+    """Return the path of the cache file of the content of `directive`."""
+    digest = hashlib.sha256()
+    for text in (
+        directive.env.proof_cache_salt,
+        *get_context(),
+        directive.name,
+        *directive.content,
+    ):
+        digest.update(text.encode("utf8"))
+        digest.update(b"\0")
+    key = digest.hexdigest()
+    return os.path.join(directive.env.proof_cache_dir, key[:2], f"{key}.pickle")
+
+
+def is_cacheable(node):
+    """Return ``True`` iff `node` (and its descendants) can be cached."""
+    for child in node.findall(include_self=False):
+        if not isinstance(child, CACHEABLE_NODES):
+            return False
+        if isinstance(child, nodes.Element) and (
+            child["ids"] or child["names"] or "refname" in child or "refid" in child
+        ):
+            return False
+    return True
+
+
+def load(directive, path, node):
+    """Load the cached content into `node`.
+
+    Return ``False`` if the content is not cached (or cannot be read).
+    """
+    try:
+        with open(path, mode="rb") as file:
+            offset, children = pickle.load(file)
+        os.utime(path)
+    except FileNotFoundError:
+        return False
+    except Exception:  # pylint: disable=broad-except
+        LOGGER.debug("ignoring unreadable cache file %s", path)
+        return False
+
+    source, _line = directive.get_source_info()
+    delta = directive.content_offset - offset
+    for child in children:
+        for descendant in child.findall(nodes.Element):
+            if descendant.line is not None:
+                descendant.line += delta
+            descendant.source = source
+            for attribute in DOCNAME_ATTRIBUTES:
+                if attribute in descendant:
+                    descendant[attribute] = directive.env.docname
+    node.extend(children)
+    return True
+
+
+def store(directive, path, node):
+    """Store the content of `node` into the cache, if it can be cached."""
+    if not is_cacheable(node):
+        return
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    # Write to a temporary file, then rename it, so that other processes
+    # never read a partially written file.
+    with tempfile.NamedTemporaryFile(dir=directory, delete=False) as file:
+        pickle.dump(
+            (
+                directive.content_offset,
+                [child.deepcopy() for child in node.children],
+            ),
+            file,
+            protocol=pickle.HIGHEST_PROTOCOL,
+        )
+    os.replace(file.name, path)
+
+
+def parse_content(directive, node):
+    """Parse the content of `directive` into `node`, using the cache."""
+    path = get_path(directive)
+    if load(directive, path, node):
+        return
+
+    dependencies = directive.env.dependencies[directive.env.docname]
+    before = len(dependencies)
+    directive.state.nested_parse(directive.content, directive.content_offset, node)
+    if len(dependencies) == before:
+        store(directive, path, node)
+
+
+def evict(app, exception):
+    """Remove least recently used cache files, to fit ``proof_cache_size``."""
+    if exception is not None or not app.config.proof_cache:
+        return
+    files = []
+    for root, _dirs, filenames in os.walk(app.env.proof_cache_dir):
+        for filename in filenames:
+            path = os.path.join(root, filename)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+
+    size = 0
+    for _mtime, filesize, path in sorted(files, reverse=True):
+        size += filesize
+        if size > app.config.proof_cache_size:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
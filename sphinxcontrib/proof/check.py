@@ -0,0 +1,275 @@
+# Copyright 2015-2025 Louis Paternault
+#
+# Sphinxcontrib-Proof is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sphinxcontrib-Proof is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Sphinxcontrib-Proof.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Builder ``proofcheck``, checking theorems without writing any document.
+
+Documents are read (in parallel, with ``sphinx-build -j N``), but not
+resolved nor written: problems are found by a single pass over the data of
+the ``proof`` domain (see :func:`check`), and reported all at once (see
+:func:`report`): as warnings, and in files ``proofcheck.txt`` and
+``proofcheck.json`` of the output directory.
+
+Problems are:
+
+- ``undefined-label``: a reference (``:proof:ref:``, ``:proof:numref:``,
+  ``:ref:``, ``:numref:``, ``proof:include`` or ``proof:dependencies``) to an
+  undefined label;
+- ``duplicate-label``: a label defined several times;
+- ``unknown-type``: an unknown ``proof:`` directive (see
+  :class:`UnknownTypeDirective`);
+- ``forward-dependency``: a statement referencing (in its content) a
+  statement which appears later (in toctree order), or itself.
+"""
+
+import json
+import os
+
+from docutils import nodes
+from sphinx.builders import Builder
+from sphinx.util import logging
+from sphinx.util.docutils import SphinxDirective
+from sphinx.util.osutil import ensuredir
+
+from . import inventory
+
+LOGGER = logging.getLogger(__name__)
+
+FILENAME = "proofcheck"
+
+
+class UnknownTypeDirective(SphinxDirective):
+    """Directive ``proof:TYPE``, where ``TYPE`` is not a theorem type.
+
+    It is reported as docutils reports unknown directives, and recorded in
+    the ``unknown_types`` data of the ``proof`` domain.
+    """
+
+    has_content = True
+    optional_arguments = 1
+    final_argument_whitespace = True
+
+    def run(self):
+        self.env.get_domain("proof").data["unknown_types"].setdefault(
+            self.env.docname, []
+        ).append((self.name, self.lineno))
+        return [
+            self.state_machine.reporter.error(
+                f'Unknown directive type "{self.name}".',
+                nodes.literal_block(self.block_text, self.block_text),
+                line=self.lineno,
+            )
+        ]
+
+
+def _is_defined(app, label):
+    """Return ``True`` iff references to `label` can be resolved."""
+    if (
+        label in app.env.get_domain("proof").labels
+        or label in app.env.get_domain("std").anonlabels
+    ):
+        return True
+    if ":" in label and "sphinx.ext.intersphinx" in app.extensions:
+        # Labels of other projects are not checked (labels are lowercased)
+        prefix = label.split(":", 1)[0]
+        if any(name.lower() == prefix for name in app.config.intersphinx_mapping):
+            return True
+    return bool(app.config.proof_inventories) and (
+        inventory.lookup(app, label) is not None
+    )
+
+
+def _get_line(domain, docname, node_id=None, label=None):
+    """Return the line of statement `node_id`, or of the first reference to `label`.
+
+    Return ``None`` if it is unknown.
+    """
+    statement_lines, reference_lines = domain.data["lines"].get(docname, ({}, {}))
+    if node_id is not None:
+        return statement_lines.get(node_id)
+    return reference_lines.get(label)
+
+
+def _check_labels(app):
+    """Yield problems about labels, as ``(kind, docname, line, message)``."""
+    domain = app.env.get_domain("proof")
+    anonlabels = app.env.get_domain("std").anonlabels
+
+    # Statements are walked in document order (not in the order documents
+    # were merged by a parallel build), so that the first instance is kept
+    owners = {}
+    duplicates = set()
+    for docname, node_id in domain.get_statement_list():
+        for label in domain.statements[docname][node_id].labels:
+            if label in owners:
+                duplicates.add(label)
+                yield (
+                    "duplicate-label",
+                    docname,
+                    _get_line(domain, docname, node_id=node_id),
+                    f"duplicate label {label!r}, "
+                    f"other instance in {owners[label]!r}",
+                )
+            else:
+                owners[label] = docname
+    for label, (docname, node_id, labelid) in domain.labels.items():
+        if label in duplicates:
+            continue
+        if anonlabels.get(label, (docname, labelid)) != (docname, labelid):
+            yield (
+                "duplicate-label",
+                docname,
+                _get_line(domain, docname, node_id=node_id),
+                f"duplicate label {label!r}, "
+                f"other instance in {anonlabels[label][0]!r}",
+            )
+
+    references = {}
+    for source in (
+        domain.references,
+        domain.data["includes"],
+        {
+            docname: [label for label, _node_id, _direct in queries if label]
+            for docname, queries in domain.dependency_lists.items()
+        },
+    ):
+        for docname, labels in source.items():
+            references.setdefault(docname, set()).update(labels)
+    for docname, labels in references.items():
+        for label in sorted(labels):
+            if not _is_defined(app, label):
+                yield (
+                    "undefined-label",
+                    docname,
+                    _get_line(domain, docname, label=label),
+                    f"undefined label: {label!r}",
+                )
+
+
+def _check_dependencies(domain):
+    """Yield problems about dependencies, as ``(kind, docname, line, message)``."""
+    ordered = domain.get_statement_list()
+    positions = {key: position for position, key in enumerate(ordered)}
+    for key in ordered:
+        for successor in domain.get_successors(key):
+            if positions[successor] < positions[key]:
+                continue
+            statement = domain.statements[key[0]][key[1]]
+            target = domain.statements[successor[0]][successor[1]]
+            if successor == key:
+                message = f"{statement.thmtype} {_describe(statement)} cites itself"
+            else:
+                message = (
+                    f"{statement.thmtype} {_describe(statement)} cites "
+                    f"{target.thmtype} {_describe(target)} ({target.docname!r}), "
+                    "which appears later"
+                )
+            yield ("forward-dependency", key[0], _get_line(domain, *key), message)
+
+
+def _describe(statement):
+    """Return a short description of `statement`, to be used in messages."""
+    if statement.labels:
+        return repr(statement.labels[0])
+    if statement.title:
+        return repr(statement.title)
+    return f"#{statement.node_id}"
+
+
+def check(app):
+    """Return the problems of the project, as a list of dictionaries."""
+    domain = app.env.get_domain("proof")
+    problems = list(_check_labels(app))
+    problems.extend(
+        (
+            "unknown-type",
+            docname,
+            line,
+            f"unknown theorem type: {name.partition(':')[2]!r}",
+        )
+        for docname, unknown in domain.data["unknown_types"].items()
+        for name, line in unknown
+    )
+    problems.extend(_check_dependencies(domain))
+    return [
+        {
+            "kind": kind,
+            "docname": docname,
+            "file": os.path.relpath(app.env.doc2path(docname), app.srcdir),
+            "line": line,
+            "message": message,
+        }
+        for kind, docname, line, message in sorted(
+            problems, key=lambda problem: (problem[1], problem[2] or 0)
+        )
+    ]
+
+
+class ProofCheckBuilder(Builder):
+    """Check theorems (labels, types and dependencies), without writing documents."""
+
+    name = "proofcheck"
+    epilog = "Theorem check finished. The report is in %(outdir)s."
+    allow_parallel = True
+
+    def get_outdated_docs(self):
+        return self.env.found_docs
+
+    def get_target_uri(self, docname, typ=None):
+        return ""
+
+    def prepare_writing(self, docnames):
+        pass
+
+    def write_documents(self, docnames):
+        # Documents are neither resolved nor written (with older versions of
+        # Sphinx, where this method does not exist, they are resolved, but not
+        # written)
+        pass
+
+    def write_doc(self, docname, doctree):
+        pass
+
+
+def report(app, exception):
+    """Report the problems found by the ``proofcheck`` builder."""
+    if exception is not None or app.builder.name != ProofCheckBuilder.name:
+        return
+    problems = check(app)
+    for problem in problems:
+        LOGGER.warning(
+            problem["message"],
+            location=(problem["docname"], problem["line"]),
+            type="proof",
+            subtype=problem["kind"],
+        )
+    if problems:
+        LOGGER.info("%d theorem problem(s) found.", len(problems))
+    else:
+        LOGGER.info("No theorem problem found.")
+
+    ensuredir(app.outdir)
+    with open(
+        os.path.join(app.outdir, f"{FILENAME}.txt"), mode="w", encoding="utf8"
+    ) as file:
+        for problem in problems:
+            location = problem["file"]
+            if problem["line"] is not None:
+                location += f":{problem['line']}"
+            file.write(f"{location}: [{problem['kind']}] {problem['message']}\n")
+    with open(
+        os.path.join(app.outdir, f"{FILENAME}.json"), mode="w", encoding="utf8"
+    ) as file:
+        json.dump({"problems": problems}, file, ensure_ascii=False, indent=2)
+        file.write("\n")
@@ -0,0 +1,180 @@
+# Copyright 2015-2025 Louis Paternault
+#
+# Sphinxcontrib-Proof is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sphinxcontrib-Proof is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Sphinxcontrib-Proof.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Dependencies between statements, and directive ``proof:dependencies``.
+
+A statement depends on the statements referenced (using ``:proof:ref:``,
+``:proof:numref:``, ``:ref:`` or ``:numref:``) in its content. Edges of this
+graph are recorded when documents are read (see
+:attr:`sphinxcontrib.proof.Statement.dependencies`). Its transitive closure is
+computed when it is first needed, by :func:`compute_closures`.
+
+Directive ``proof:dependencies`` is replaced by a placeholder when documents
+are read, which is replaced by the actual list of dependencies when
+documents are resolved (see :func:`resolve`).
+"""
+
+from docutils import nodes
+from docutils.parsers.rst import directives
+from sphinx.util import logging
+from sphinx.util.docutils import SphinxDirective
+
+LOGGER = logging.getLogger(__name__)
+
+
+class DependenciesNode(nodes.General, nodes.Element):
+    """Placeholder for the list of dependencies of a statement."""
+
+
+class DependenciesDirective(SphinxDirective):
+    """List statements a statement relies on.
+
+    The statement is the one labelled by the argument or, without argument,
+    the statement containing the directive.
+    """
+
+    required_arguments = 0
+    optional_arguments = 1
+    option_spec = {"direct": directives.flag}
+
+    def run(self):
+        node = DependenciesNode()
+        self.set_source_info(node)
+        node["label"] = (
+            nodes.fully_normalize_name(self.arguments[0]) if self.arguments else None
+        )
+        node["direct"] = "direct" in self.options
+        return [node]
+
+
+def compute_closures(root, get_successors, closures):
+    """Compute the transitive dependencies of `root`, and of its dependencies.
+
+    :param root: Statement whose dependencies are computed.
+    :param get_successors: Function returning the direct dependencies of a
+        statement.
+    :param closures: Dictionary mapping statements to their (already known)
+        transitive dependencies, as frozensets. It is updated.
+
+    This is Tarjan's algorithm (iterative, to handle deep graphs): the
+    statements of a strongly connected component share their closure, which
+    is the union of the closures of the components they reference.
+    """
+    index = {root: 0}
+    lowlink = {root: 0}
+    stack = [root]
+    on_stack = {root}
+    work = [(root, iter(get_successors(root)))]
+    while work:
+        key, successors = work[-1]
+        for successor in successors:
+            if successor in closures:
+                continue
+            if successor not in index:
+                index[successor] = lowlink[successor] = len(index)
+                stack.append(successor)
+                on_stack.add(successor)
+                work.append((successor, iter(get_successors(successor))))
+                break
+            if successor in on_stack:
+                lowlink[key] = min(lowlink[key], index[successor])
+        else:
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                lowlink[parent] = min(lowlink[parent], lowlink[key])
+            if lowlink[key] == index[key]:
+                # `key` is the root of a strongly connected component
+                component = set()
+                while key not in component:
+                    component.add(stack.pop())
+                on_stack -= component
+                _close_component(component, get_successors, closures)
+
+
+def _close_component(component, get_successors, closures):
+    """Compute the (shared) closure of strongly connected `component`."""
+    closure = set()
+    for member in component:
+        for successor in get_successors(member):
+            closure.add(successor)
+            if successor not in component:
+                closure |= closures[successor]
+    closure = frozenset(closure)
+    for member in component:
+        closures[member] = closure
+
+
+def get_key(domain, docname, query):
+    """Return the statement listed by a ``proof:dependencies`` directive.
+
+    :param docname: Document containing the directive.
+    :param query: Directive, as ``(label, node_id, direct)``.
+
+    Return ``None`` if the statement is unknown.
+    """
+    label, node_id, _direct = query
+    if label is None:
+        return (docname, node_id)
+    if label in domain.labels:
+        return domain.labels[label][:2]
+    return None
+
+
+def resolve(app, doctree, docname):
+    """Replace ``proof:dependencies`` placeholders of `doctree` by lists."""
+    domain = app.env.get_domain("proof")
+    thmtypes = app.config.proof_theorem_types
+    for node in list(doctree.findall(DependenciesNode)):
+        if node["label"] is None and "node_id" not in node:
+            # Misplaced directive (a warning has been logged when reading it)
+            node.replace_self([])
+            continue
+        key = get_key(
+            domain,
+            node["docname"],
+            (node["label"], node.get("node_id"), node["direct"]),
+        )
+        if key is None:
+            LOGGER.warning(
+                "proof:dependencies: undefined label: %r", node["label"], location=node
+            )
+            node.replace_self([])
+            continue
+
+        direct = domain.get_successors(key)
+        listing = nodes.bullet_list(classes=["proof", "proof-dependencies"])
+        for dependency in domain.get_dependencies(key, node["direct"]):
+            statement = domain.statements[dependency[0]][dependency[1]]
+            refnode = domain.get_reference_node(
+                app.builder,
+                docname,
+                dependency,
+                domain.statement_name(
+                    statement.title, thmtypes[statement.thmtype], statement.number
+                ),
+            )
+            listing += nodes.list_item(
+                "",
+                nodes.paragraph("", "", refnode),
+                classes=[
+                    (
+                        "proof-dependency-direct"
+                        if dependency in direct
+                        else "proof-dependency-indirect"
+                    )
+                ],
+            )
+        node.replace_self(listing if listing.children else [])
@@ -0,0 +1,112 @@
+# Copyright 2015-2025 Louis Paternault
+#
+# Sphinxcontrib-Proof is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sphinxcontrib-Proof is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Sphinxcontrib-Proof.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Directive ``proof:include``, restating a labelled statement.
+
+The directive is replaced by a placeholder when documents are read: the
+statement is not parsed again. When the including document is resolved, the
+placeholder is replaced by a copy of the statement, taken from the doctree of
+its document (see :class:`IncludeTransform`). This happens before references
+are resolved, so that references of the copy are resolved relatively to the
+including document.
+
+The copy keeps the number of the original statement (see attribute
+``included_from``, used by
+:meth:`sphinxcontrib.proof.ProofDomain.resolve_numbers`), but its ids are
+prefixed, so that it is not a target of references.
+"""
+
+from docutils import nodes
+from sphinx.transforms.post_transforms import SphinxPostTransform
+from sphinx.util import logging
+from sphinx.util.docutils import SphinxDirective
+
+LOGGER = logging.getLogger(__name__)
+
+
+class IncludeNode(nodes.General, nodes.Element):
+    """Placeholder for a copy of a statement."""
+
+
+class IncludeDirective(SphinxDirective):
+    """Restate the statement labelled by the argument."""
+
+    required_arguments = 1
+    final_argument_whitespace = True
+
+    def run(self):
+        node = IncludeNode()
+        self.set_source_info(node)
+        node["label"] = nodes.fully_normalize_name(self.arguments[0])
+        # Unique in the document (and in documents assembled by singlehtml)
+        serial = self.env.new_serialno("proof-include")
+        node["prefix"] = nodes.make_id(f"include-{self.env.docname}-{serial}") + "-"
+        return [node]
+
+
+def _prepare(copy, prefix, docname, refdoc):
+    """Prepare `copy` (a copy of a statement of `docname`) to be included.
+
+    :param prefix: Prefix of ids of the copy.
+    :param refdoc: Including document.
+    """
+    for node in copy.findall(nodes.Element):
+        if "thmtype" in node and node["ids"] and "included_from" not in node:
+            node["included_from"] = (docname, node["ids"][0])
+        for attribute in ("ids", "backrefs"):
+            if node.get(attribute):
+                node[attribute] = [prefix + value for value in node[attribute]]
+        if "refid" in node:
+            node["refid"] = prefix + node["refid"]
+        if "refdoc" in node:
+            # Resolve references relatively to the including document
+            node["refdoc"] = refdoc
+    copy["classes"].append("proof-included")
+
+
+class IncludeTransform(SphinxPostTransform):
+    """Replace ``proof:include`` placeholders by copies of statements."""
+
+    # Before references are resolved
+    default_priority = 5
+
+    def run(self, **kwargs):
+        self._expand(self.document, ())
+
+    def _expand(self, tree, stack):
+        """Expand placeholders of `tree`.
+
+        :param stack: Labels being expanded (to detect recursive inclusions).
+        """
+        domain = self.env.get_domain("proof")
+        for node in list(tree.findall(IncludeNode)):
+            label = node["label"]
+            statement = domain.get_statement(label)
+            if statement is None:
+                LOGGER.warning(
+                    "proof:include: undefined label: %r", label, location=node
+                )
+                node.replace_self([])
+                continue
+            if label in stack:
+                LOGGER.warning(
+                    "proof:include: recursive inclusion of %r", label, location=node
+                )
+                node.replace_self([])
+                continue
+            copy = domain.get_statement_node(label).deepcopy()
+            self._expand(copy, stack + (label,))
+            _prepare(copy, node["prefix"], statement.docname, self.env.docname)
+            node.replace_self(copy)
@@ -0,0 +1,257 @@
+# Copyright 2015-2025 Louis Paternault
+#
+# Sphinxcontrib-Proof is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sphinxcontrib-Proof is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Sphinxcontrib-Proof.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Inventories of theorems, to reference theorems of other projects.
+
+HTML builders write an inventory of labelled theorems, ``proofs.inv``, in the
+output directory. Its format mimics Sphinx ``objects.inv``: four header lines,
+followed by zlib-compressed lines of tab-separated fields: label, theorem type,
+human readable theorem type, number, URI (relative to the output directory),
+and title.
+
+Inventories of other projects are listed in option ``proof_inventories``.
+They are only loaded when a ``:proof:ref:`` or ``:proof:numref:`` reference
+cannot be resolved locally. Parsed inventories are cached in the doctree
+directory, and only loaded again if the inventory changed (using the
+modification time of local files, and the ``ETag`` and ``Last-Modified``
+headers of remote files).
+"""
+
+import collections
+import os
+import pickle
+import posixpath
+import urllib.error
+import urllib.request
+import zlib
+
+from sphinx.util import logging
+from sphinx.util.osutil import ensuredir, relative_uri
+
+LOGGER = logging.getLogger(__name__)
+
+FILENAME = "proofs.inv"
+HEADER = "# Sphinx theorem inventory version 1\n"
+
+# Builders writing an inventory
+BUILDERS = ["html", "dirhtml"]
+
+Entry = collections.namedtuple(
+    "Entry", ["thmtype", "typename", "number", "title", "uri"]
+)
+Entry.__doc__ = """Theorem of an inventory.
+
+- ``thmtype``: theorem type (e.g. ``"theorem"``);
+- ``typename``: human readable theorem type (e.g. ``"Theorem"``);
+- ``number``: theorem number (tuple of integers), or ``None`` if unnumbered;
+- ``title``: theorem title (or ``""``);
+- ``uri``: URI of the theorem (absolute, or relative to the output directory).
+"""
+
+################################################################################
+# Write inventory
+
+
+def dump(app, exception):
+    """Write the inventory of theorems of this project."""
+    if exception is not None or app.builder.name not in BUILDERS:
+        return
+    domain = app.env.get_domain("proof")
+    thmtypes = app.config.proof_theorem_types
+
+    lines = []
+    for label, (docname, node_id, labelid) in sorted(domain.labels.items()):
+        statement = domain.statements[docname][node_id]
+        fields = [
+            label,
+            statement.thmtype,
+            thmtypes.get(statement.thmtype, statement.thmtype),
+            ".".join(map(str, statement.number or ())),
+            f"{app.builder.get_target_uri(docname)}#{labelid}",
+            statement.title,
+        ]
+        lines.append("\t".join(" ".join(field.split()) for field in fields))
+
+    with open(os.path.join(app.outdir, FILENAME), mode="wb") as file:
+        file.write(HEADER.encode("utf8"))
+        file.write(f"# Project: {app.config.project}\n".encode("utf8"))
+        file.write(f"# Version: {app.config.version}\n".encode("utf8"))
+        file.write(b"# The remainder of this file is compressed using zlib.\n")
+        file.write(zlib.compress("\n".join(lines).encode("utf8")))
+
+
+################################################################################
+# Read inventories
+
+
+def parse(data, base):
+    """Parse inventory `data` (bytes), and return a dictionary of :class:`Entry`.
+
+    URIs are prefixed by `base` (the URI of the project).
+    """
+    lines = data.split(b"\n", 4)
+    if len(lines) < 5 or lines[0].decode("utf8") + "\n" != HEADER:
+        raise ValueError("not a theorem inventory")
+
+    entries = {}
+    for line in zlib.decompress(lines[4]).decode("utf8").split("\n"):
+        if not line:
+            continue
+        label, thmtype, typename, number, uri, title = line.split("\t")
+        entries[label] = Entry(
+            thmtype=thmtype,
+            typename=typename,
+            number=tuple(map(int, number.split("."))) if number else None,
+            title=title,
+            uri=posixpath.join(base, uri),
+        )
+    return entries
+
+
+def _load_file(path, validator):
+    """Read local inventory `path`.
+
+    Return ``(data, validator)``, where `data` is ``None`` if `validator` (the
+    one of the previous read) shows that the file did not change.
+    """
+    stat = os.stat(path)
+    current = (stat.st_mtime_ns, stat.st_size)
+    if current == validator:
+        return None, validator
+    with open(path, mode="rb") as file:
+        return file.read(), current
+
+
+def _load_url(url, validator, user_agent):
+    """Download remote inventory `url`.
+
+    Return ``(data, validator)``, where `data` is ``None`` if `validator` (the
+    ``ETag`` and ``Last-Modified`` headers of the previous download) shows
+    that the file did not change.
+    """
+    request = urllib.request.Request(url, headers={"User-Agent": user_agent})
+    if validator is not None:
+        etag, modified = validator
+        if etag:
+            request.add_header("If-None-Match", etag)
+        if modified:
+            request.add_header("If-Modified-Since", modified)
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            return response.read(), (
+                response.headers.get("ETag"),
+                response.headers.get("Last-Modified"),
+            )
+    except urllib.error.HTTPError as error:
+        if error.code == 304:
+            return None, validator
+        raise
+
+
+def load(app, name):
+    """Return the entries of inventory `name` (see ``proof_inventories``).
+
+    Parsed inventories are cached in the doctree directory, together with
+    what is needed to check whether they changed since they were parsed.
+    Return an empty dictionary (and log a warning) if the inventory cannot be
+    loaded.
+    """
+    base, location = app.config.proof_inventories[name]
+    if location is None:
+        if "://" in base:
+            location = posixpath.join(base, FILENAME)
+        else:
+            location = os.path.join(app.outdir, base, FILENAME)
+    elif "://" not in location:
+        location = os.path.join(app.confdir, location)
+    remote = "://" in location
+
+    cachename = os.path.join(app.doctreedir, "proof-inventories", f"{name}.pickle")
+    try:
+        with open(cachename, mode="rb") as file:
+            cached = pickle.load(file)
+    except Exception:  # pylint: disable=broad-except
+        cached = {}
+    if cached.get("location") != (base, location):
+        cached = {"location": (base, location)}
+
+    try:
+        if remote:
+            data, validator = _load_url(
+                location,
+                cached.get("validator"),
+                getattr(app.config, "user_agent", None) or "sphinxcontrib-proof",
+            )
+        else:
+            data, validator = _load_file(location, cached.get("validator"))
+        if data is None:
+            return cached["entries"]
+        entries = parse(data, base)
+    except (OSError, ValueError, zlib.error) as error:
+        LOGGER.warning(
+            "failed to load theorem inventory %r from %s: %s", name, location, error
+        )
+        return cached.get("entries", {})
+
+    ensuredir(os.path.dirname(cachename))
+    with open(cachename, mode="wb") as file:
+        pickle.dump(
+            {"location": (base, location), "validator": validator, "entries": entries},
+            file,
+            protocol=pickle.HIGHEST_PROTOCOL,
+        )
+    return entries
+
+
+def lookup(app, target):
+    """Return the :class:`Entry` of the theorem labelled `target`, or ``None``.
+
+    The label may be prefixed by the name of an inventory (``name:label``).
+    Otherwise, every inventory is searched. Inventories are loaded on first
+    use, once per build.
+    """
+    inventories = app.builder.__dict__.setdefault("proof_inventories", {})
+    names = list(app.config.proof_inventories)
+    if ":" in target:
+        # Targets are lowercased by roles
+        prefix, label = target.split(":", 1)
+        for name in names:
+            if name.lower() == prefix:
+                names, target = [name], label
+                break
+
+    for name in names:
+        if name not in inventories:
+            inventories[name] = load(app, name)
+        if target in inventories[name]:
+            return inventories[name][target]
+    return None
+
+
+def missing_reference(app, env, node, contnode):
+    """Resolve references to theorems of other projects."""
+    if node.get("refdomain") != "proof" or not app.config.proof_inventories:
+        return None
+    entry = lookup(app, node["reftarget"])
+    if entry is None:
+        return None
+    if "://" not in entry.uri:
+        # Relative to the output directory: make it relative to this document
+        uri, _, anchor = entry.uri.partition("#")
+        uri = relative_uri(app.builder.get_target_uri(node["refdoc"]), uri)
+        entry = entry._replace(uri=f"{uri}#{anchor}")
+    return env.get_domain("proof").resolve_inventory_xref(
+        node["reftype"], entry, node, contnode
+    )
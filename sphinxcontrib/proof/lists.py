@@ -0,0 +1,121 @@
+# Copyright 2015-2025 Louis Paternault
+#
+# Sphinxcontrib-Proof is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sphinxcontrib-Proof is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Sphinxcontrib-Proof.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Directive ``proof:list``, listing statements (like LaTeX ``\\listoftheorems``).
+
+The directive is replaced by a placeholder when documents are read, which is
+replaced by the actual list when documents are resolved (see
+:func:`resolve`). Lists are computed from the statement index of
+:class:`sphinxcontrib.proof.ProofDomain` (see
+:meth:`sphinxcontrib.proof.ProofDomain.get_statement_list`), without reading
+any doctree.
+"""
+
+import re
+
+from docutils import nodes
+from docutils.parsers.rst import directives
+from sphinx.util import docname_join, logging
+from sphinx.util.docutils import SphinxDirective
+
+LOGGER = logging.getLogger(__name__)
+
+
+class StatementListNode(nodes.General, nodes.Element):
+    """Placeholder for a list of statements."""
+
+
+class StatementListDirective(SphinxDirective):
+    """List statements, possibly filtered by type and document subtree."""
+
+    option_spec = {
+        "types": directives.unchanged_required,
+        "subtree": directives.unchanged_required,
+    }
+
+    def run(self):
+        node = StatementListNode()
+        self.set_source_info(node)
+        node["docname"] = self.env.docname
+
+        if "types" in self.options:
+            node["types"] = tuple(
+                sorted(set(re.split(r"[\s,]+", self.options["types"].strip())))
+            )
+            for thmtype in node["types"]:
+                if thmtype not in self.config.proof_theorem_types:
+                    LOGGER.warning(
+                        "proof:list: unknown theorem type: %r", thmtype, location=node
+                    )
+        else:
+            node["types"] = None
+
+        if "subtree" in self.options:
+            node["subtree"] = docname_join(self.env.docname, self.options["subtree"])
+        else:
+            node["subtree"] = None
+        return [node]
+
+
+def get_documents(env, root=None):
+    """Return the documents of the toctree of `root`, in toctree order.
+
+    If `root` is ``None``, return every document: the documents of the
+    toctree of the root document, followed by the other documents.
+    """
+    start = env.config.root_doc if root is None else root
+    documents = []
+    seen = set()
+    stack = [start]
+    while stack:
+        docname = stack.pop()
+        if docname in seen or docname not in env.all_docs:
+            continue
+        seen.add(docname)
+        documents.append(docname)
+        stack.extend(reversed(env.toctree_includes.get(docname, ())))
+    if root is None:
+        documents.extend(sorted(set(env.all_docs) - seen))
+    return documents
+
+
+def resolve(app, doctree, docname):
+    """Replace ``proof:list`` placeholders of `doctree` by lists."""
+    domain = app.env.get_domain("proof")
+    thmtypes = app.config.proof_theorem_types
+    for node in list(doctree.findall(StatementListNode)):
+        if node["subtree"] is not None and node["subtree"] not in app.env.all_docs:
+            LOGGER.warning(
+                "proof:list: unknown document: %r", node["subtree"], location=node
+            )
+            node.replace_self([])
+            continue
+
+        listing = nodes.bullet_list(classes=["proof", "proof-list"])
+        for key in domain.get_statement_list(node["types"], node["subtree"]):
+            statement = domain.statements[key[0]][key[1]]
+            text = thmtypes[statement.thmtype]
+            if statement.number:
+                text += " " + ".".join(map(str, statement.number))
+            if statement.title:
+                text += f" ({statement.title})"
+            listing += nodes.list_item(
+                "",
+                nodes.paragraph(
+                    "", "", domain.get_reference_node(app.builder, docname, key, text)
+                ),
+                classes=[f"proof-type-{statement.thmtype}"],
+            )
+        node.replace_self(listing if listing.children else [])
@@ -0,0 +1,225 @@
+# Copyright 2015-2025 Louis Paternault
+#
+# Sphinxcontrib-Proof is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sphinxcontrib-Proof is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Sphinxcontrib-Proof.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Numbering of statements (used if ``proof_html_numbering`` is ``"proof"``).
+
+Statements are numbered like the LaTeX preamble does (see
+``_latex_preamble_iterator()``): a counter, shared by every theorem type
+(unless ``proof_html_numbering_shared`` is ``False``), reset at each
+``proof_latex_parent`` section, whose number prefixes statement numbers.
+
+As in LaTeX documents, every type but those of ``proof_latex_notheorem``
+increments the counter, including types of ``proof_html_nonumbers`` (which
+increment it, but do not display their number).
+
+Numbering is done in two steps:
+
+- the local numbering of a document (the counter and the index of each of
+  its statements) only depends on the document and its section numbers. It
+  is stored in the environment, and only computed again when the document is
+  read again, or when its section numbers change;
+- documents are then traversed once, in toctree order, to compute the value
+  of each counter at the beginning of each document. Statement numbers of a
+  document are only computed again if one of those values changed.
+"""
+
+from docutils import nodes
+
+# Sectioning levels of LaTeX
+LEVELS = [
+    "part",
+    "chapter",
+    "section",
+    "subsection",
+    "subsubsection",
+    "paragraph",
+    "subparagraph",
+]
+
+
+def get_toplevel(config):
+    """Return the top-level sectioning of the LaTeX document of the root document.
+
+    This is ``latex_toplevel_sectioning`` if set, or, like Sphinx does, the
+    default of the LaTeX theme of this document: ``section`` for ``howto``
+    documents (unless their class is a Japanese class), ``chapter`` otherwise.
+    """
+    if config.latex_toplevel_sectioning:
+        return config.latex_toplevel_sectioning
+    # Document of the root document first
+    documents = sorted(
+        config.latex_documents, key=lambda document: document[0] != config.root_doc
+    )
+    if (
+        documents
+        and documents[0][4] == "howto"
+        and not config.latex_docclass.get("howto", "article").startswith("j")
+    ):
+        return "section"
+    return "chapter"
+
+
+def get_depth(config):
+    """Return the number of section numbers prefixing statement numbers.
+
+    This is the depth of ``proof_latex_parent``, relative to the top-level
+    sectioning of LaTeX documents (see :func:`get_toplevel`), which Sphinx
+    maps to the top-level sections of numbered toctrees.
+    """
+    if not config.proof_latex_parent:
+        return 0
+    toplevel = get_toplevel(config)
+    try:
+        return max(
+            0, LEVELS.index(config.proof_latex_parent) - LEVELS.index(toplevel) + 1
+        )
+    except ValueError:
+        return 0
+
+
+def get_section_anchors(node, first):
+    """Return the anchors of the sections containing `node`.
+
+    Anchors are the keys of ``env.toc_secnumbers`` (``""`` for `first`, the
+    first section of the document), from the innermost section to the
+    outermost one.
+    """
+    anchors = []
+    parent = node.parent
+    while parent is not None:
+        if isinstance(parent, nodes.section) and parent["ids"]:
+            anchors.append("" if parent is first else f"#{parent['ids'][0]}")
+        parent = parent.parent
+    return tuple(anchors)
+
+
+def _get_prefix(anchors, secnumbers, depth):
+    """Return the section numbers prefixing numbers of a statement.
+
+    :param anchors: Anchors of the sections containing the statement (see
+        :func:`get_section_anchors`).
+    :param secnumbers: Section numbers of the document.
+    :param depth: Number of section numbers (see :func:`get_depth`).
+    """
+    for anchor in anchors:
+        if secnumbers.get(anchor):
+            secnumber = tuple(secnumbers[anchor])
+            return secnumber[:depth] + (0,) * (depth - len(secnumber))
+    return ()
+
+
+def _number_document(domain, docname, depth, shared):
+    """Return the local numbering of `docname`.
+
+    It is a tuple ``(numbering, counts)``, where ``numbering`` is a tuple of
+    ``(node_id, counter, index)``, and ``counts`` maps counters to the number
+    of statements of this document they count.
+    """
+    secnumbers = domain.env.toc_secnumbers.get(docname, {})
+    nonumbers = domain.env.config.proof_html_nonumbers
+    notheorem = domain.env.config.proof_latex_notheorem
+    sections = domain.data["sections"].get(docname, {})
+    counts = {}
+    numbering = []
+    for node_id, statement in domain.statements[docname].items():
+        if statement.thmtype in notheorem:
+            continue
+        prefix = _get_prefix(sections.get(node_id, ()), secnumbers, depth)
+        counter = (prefix, None if shared else statement.thmtype)
+        counts[counter] = counts.get(counter, 0) + 1
+        if statement.thmtype not in nonumbers:
+            numbering.append((node_id, counter, counts[counter]))
+    return tuple(numbering), counts
+
+
+def _get_local_numbering(domain, docname, depth, shared):
+    """Return the cached numbering of `docname`, computing it if needed.
+
+    It is a tuple ``(anchors, signature, numbering, counts, offsets)``, where
+    ``signature`` is the section numbers of ``anchors`` the numbering was
+    computed with, and ``offsets`` maps counters to their value at the
+    beginning of the document, when numbers were last assigned (``None`` if
+    they never were).
+    """
+    secnumbers = domain.env.toc_secnumbers.get(docname, {})
+    entry = domain.data["numbering"].get(docname)
+    if entry is not None and entry[1] == tuple(
+        secnumbers.get(anchor) for anchor in entry[0]
+    ):
+        return entry
+    anchors = tuple(
+        sorted(
+            {
+                anchor
+                for chain in domain.data["sections"].get(docname, {}).values()
+                for anchor in chain
+            }
+        )
+    )
+    signature = tuple(secnumbers.get(anchor) for anchor in anchors)
+    return (
+        (anchors, signature)
+        + _number_document(domain, docname, depth, shared)
+        + (None,)
+    )
+
+
+def _set_numbers(statements, numbering, offsets):
+    """Set the numbers of `statements`, given the value of counters `offsets`.
+
+    Return ``True`` iff a number changed.
+    """
+    changed = False
+    for node_id, counter, index in numbering:
+        number = counter[0] + (offsets[counter] + index,)
+        if statements[node_id].number != number:
+            statements[node_id] = statements[node_id]._replace(number=number)
+            changed = True
+    return changed
+
+
+def assign(domain, documents):
+    """Number the statements of `documents` (in this order).
+
+    Return the set of documents in which a statement number changed.
+    """
+    config = domain.env.config
+    depth = get_depth(config)
+    shared = config.proof_html_numbering_shared
+    settings = (
+        depth,
+        shared,
+        tuple(sorted(config.proof_html_nonumbers)),
+        tuple(sorted(config.proof_latex_notheorem)),
+    )
+    if domain.data["numbering_settings"] != settings:
+        domain.data["numbering"].clear()
+        domain.data["numbering_settings"] = settings
+
+    counters = {}
+    outdated = set()
+    for docname in documents:
+        statements = domain.statements.get(docname)
+        if not statements:
+            continue
+        entry = _get_local_numbering(domain, docname, depth, shared)
+        counts = entry[3]
+        offsets = {counter: counters.get(counter, 0) for counter in counts}
+        if offsets != entry[4] and _set_numbers(statements, entry[2], offsets):
+            outdated.add(docname)
+        for counter, count in counts.items():
+            counters[counter] = counters.get(counter, 0) + count
+        domain.data["numbering"][docname] = entry[:4] + (offsets,)
+    return outdated
@@ -0,0 +1,188 @@
+# Copyright 2015-2025 Louis Paternault
+#
+# Sphinxcontrib-Proof is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sphinxcontrib-Proof is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Sphinxcontrib-Proof.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Standalone pages of statements (see option ``proof_html_statement_pages``).
+
+Each numbered statement of document ``DOCNAME`` gets a page ``DOCNAME.ANCHOR``
+(where ``ANCHOR`` is the anchor of the statement in its document), containing
+the statement (and the proof following it, if
+``proof_html_statement_pages_proof`` is set).
+
+Statements are not rendered twice: when a document is written (possibly by
+the parallel writer), the HTML of its statements is captured by the
+translator (see :func:`store`), and saved in the doctree directory (see
+:func:`save`). Pages are then written at the end of the build
+(see :func:`collect`), only if their content changed since the last build.
+
+Pages are in the same directory as their document, so that relative links of
+statements stay valid (only links to the document itself have to be fixed).
+"""
+
+import hashlib
+import html
+import os
+import pickle
+import re
+
+from sphinx.util.osutil import ensuredir, relative_uri
+
+# Builders writing statement pages
+BUILDERS = ["html", "dirhtml"]
+
+# Directory (in the doctree directory) of captured statements
+DIRECTORY = "proof-pages"
+
+LOCAL_LINK = re.compile(r'(\shref=")#')
+
+
+def is_enabled(builder):
+    """Return ``True`` iff `builder` writes statement pages."""
+    return builder.name in BUILDERS and builder.config.proof_html_statement_pages
+
+
+def get_pagename(docname, anchor):
+    """Return the name of the page of statement `anchor` of document `docname`."""
+    return f"{docname}.{anchor}"
+
+
+def store(writer, node, numbered, fragment):
+    """Store `fragment`, the HTML of `node` (a statement).
+
+    If `numbered` is ``False``, the statement is only stored if it is a proof
+    following a numbered statement, which it is appended to.
+    """
+    docname = writer.builder.current_docname
+    pages = writer.builder.__dict__.setdefault("proof_statement_pages", {})
+
+    if numbered:
+        domain = writer.builder.env.get_domain("proof")
+        statement = domain.statements.get(docname, {}).get(node["ids"][0])
+        if statement is None:
+            return
+        if statement.labels:
+            anchor = domain.labels[statement.labels[0]][2]
+        else:
+            anchor = statement.node_id
+        name = domain.statement_name(
+            statement.title,
+            writer.builder.config.proof_theorem_types[statement.thmtype],
+            statement.number,
+        )
+        pages.setdefault(docname, {})[anchor] = [name, fragment]
+        writer.proof_page_previous = (node, anchor)
+    elif (
+        node["thmtype"] == "proof"
+        and writer.builder.config.proof_html_statement_pages_proof
+        and node.parent is not None
+        and node.parent.index(node) > 0
+    ):
+        previous, anchor = writer.__dict__.get("proof_page_previous", (None, None))
+        if node.parent[node.parent.index(node) - 1] is previous:
+            pages[docname][anchor][1] += fragment
+
+
+def save(app, pagename, templatename, context, doctree):
+    """Save the statements captured while writing document `pagename`."""
+    # pylint: disable=unused-argument
+    if doctree is None or not is_enabled(app.builder):
+        return
+    pages = app.builder.__dict__.get("proof_statement_pages", {}).pop(pagename, {})
+    filename = os.path.join(app.doctreedir, DIRECTORY, f"{pagename}.pickle")
+    ensuredir(os.path.dirname(filename))
+    with open(filename, mode="wb") as file:
+        pickle.dump(pages, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def record_written(app, doctree, docname):
+    """Remember that `docname` is written during this build."""
+    # pylint: disable=unused-argument
+    if is_enabled(app.builder):
+        app.builder.__dict__.setdefault("proof_written_docs", set()).add(docname)
+
+
+def _digest(page):
+    """Return a digest of `page` (a ``[name, html]`` list)."""
+    return hashlib.blake2b("\0".join(page).encode("utf8"), digest_size=8).digest()
+
+
+def _remove(builder, docname, anchors):
+    """Remove the pages of statements `anchors` of document `docname`."""
+    for anchor in anchors:
+        filename = builder.get_outfilename(get_pagename(docname, anchor))
+        if os.path.exists(filename):
+            os.remove(filename)
+        if builder.name == "dirhtml":
+            # The page had a directory of its own
+            try:
+                os.rmdir(os.path.dirname(filename))
+            except OSError:
+                pass
+
+
+def collect(app):
+    """Yield the pages of statements which changed since the last build.
+
+    Only statements of documents written during this build are considered:
+    the statements of other documents did not change. Pages of statements
+    which were removed (or whose anchor changed) are deleted.
+    """
+    if not is_enabled(app.builder):
+        return
+    builder = app.builder
+    cachename = os.path.join(app.doctreedir, f"{DIRECTORY}.pickle")
+    try:
+        with open(cachename, mode="rb") as file:
+            outdir, digests = pickle.load(file)
+    except Exception:  # pylint: disable=broad-except
+        outdir, digests = None, {}
+    if outdir != app.outdir:
+        digests = {}
+    for docname in set(digests) - set(app.env.all_docs):
+        _remove(builder, docname, digests.pop(docname))
+
+    for docname in sorted(builder.__dict__.pop("proof_written_docs", ())):
+        try:
+            with open(
+                os.path.join(app.doctreedir, DIRECTORY, f"{docname}.pickle"), mode="rb"
+            ) as file:
+                pages = pickle.load(file)
+        except FileNotFoundError:
+            continue
+        # Links to the document itself
+        docuri = relative_uri(
+            builder.get_target_uri(get_pagename(docname, "")),
+            builder.get_target_uri(docname),
+        )
+        previous = digests.pop(docname, {})
+        _remove(builder, docname, set(previous) - set(pages))
+        digests[docname] = {}
+        for anchor, page in pages.items():
+            pagename = get_pagename(docname, anchor)
+            digests[docname][anchor] = _digest(page)
+            if previous.get(anchor) == digests[docname][anchor] and os.path.exists(
+                builder.get_outfilename(pagename)
+            ):
+                continue
+            yield (
+                pagename,
+                {
+                    "title": html.escape(page[0]),
+                    "body": LOCAL_LINK.sub(rf"\1{docuri}#", page[1]),
+                },
+                "page.html",
+            )
+
+    with open(cachename, mode="wb") as file:
+        pickle.dump((app.outdir, digests), file, protocol=pickle.HIGHEST_PROTOCOL)
@@ -0,0 +1,130 @@
+# Copyright 2015-2025 Louis Paternault
+#
+# Sphinxcontrib-Proof is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sphinxcontrib-Proof is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Sphinxcontrib-Proof.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Compact pickling of statement nodes, and of the statement index.
+
+Statement nodes are stored in doctrees, and the statement index in the
+environment: both are pickled (and loaded again) at each build.
+
+- Nodes (see :class:`CompactElement`) are pickled without the attributes
+  having their default value (empty lists of ids, classes, names, etc., empty
+  raw source, unknown source and line, tag name).
+- Statements of a document (see :class:`StatementTable`) are pickled as
+  columns (one tuple per field), where the document name is stored once, each
+  type is replaced by its index in a tuple of types, and trailing columns
+  only containing default values are omitted. Statements are then rebuilt
+  without calling any Python code for each of them.
+
+Types are interned when they are loaded, so that they are shared by every
+statement.
+"""
+
+import itertools
+import sys
+
+from docutils import nodes
+
+# Default values of fields of statements (from ``title`` to the last field)
+STATEMENT_DEFAULTS = ("", None, (), ())
+
+
+class CompactElement(nodes.Element):
+    """Element pickled without the attributes having their default value."""
+
+    __slots__ = ()
+
+    def __reduce__(self):
+        attributes = {
+            key: value
+            for key, value in self.attributes.items()
+            if value or key not in self.list_attributes
+        }
+        state = {
+            key: value
+            for key, value in self.__dict__.items()
+            if not (
+                key == "attributes"
+                or (key == "tagname" and value == type(self).__name__)
+                or (key == "rawsource" and value == "")
+                or (key in ("source", "line") and value is None)
+            )
+        }
+        return (_load_element, (type(self), attributes), state)
+
+
+def _load_element(cls, attributes):
+    """Return an element of class `cls`, with default values (and `attributes`)."""
+    element = cls.__new__(cls)
+    element.tagname = cls.__name__
+    element.rawsource = ""
+    element.source = None
+    element.line = None
+    element.attributes = {key: [] for key in cls.list_attributes}
+    element.attributes.update(attributes)
+    if "thmtype" in attributes:
+        element.attributes["thmtype"] = sys.intern(attributes["thmtype"])
+    return element
+
+
+class StatementTable(dict):
+    """Statements of a document: dictionary mapping node ids to statements."""
+
+    __slots__ = ()
+
+    def __reduce__(self):
+        if not self:
+            return (StatementTable, ())
+        statements = tuple(self.values())
+        types = tuple(dict.fromkeys(statement.thmtype for statement in statements))
+        codes = tuple(types.index(statement.thmtype) for statement in statements)
+        if len(types) <= 256:
+            codes = bytes(codes)
+        columns = list(zip(*statements))[3:]
+        while columns and all(
+            value == STATEMENT_DEFAULTS[len(columns) - 1] for value in columns[-1]
+        ):
+            columns.pop()
+        return (
+            _load_statements,
+            (statements[0].docname, types, codes, tuple(self), *columns),
+        )
+
+
+def _load_statements(docname, types, codes, node_ids, *columns):
+    """Return the :class:`StatementTable` pickled by :meth:`StatementTable.__reduce__`."""
+    # pylint: disable=import-outside-toplevel, cyclic-import
+    from . import Statement
+
+    types = [sys.intern(thmtype) for thmtype in types]
+    size = len(node_ids)
+    columns += tuple(
+        itertools.repeat(default, size)
+        for default in STATEMENT_DEFAULTS[len(columns) :]
+    )
+    return StatementTable(
+        zip(
+            node_ids,
+            map(
+                tuple.__new__,
+                itertools.repeat(Statement),
+                zip(
+                    itertools.repeat(docname, size),
+                    node_ids,
+                    map(types.__getitem__, codes),
+                    *columns,
+                ),
+            ),
+        )
+    )
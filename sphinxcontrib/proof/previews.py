@@ -0,0 +1,92 @@
+# Copyright 2015-2025 Louis Paternault
+#
+# Sphinxcontrib-Proof is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sphinxcontrib-Proof is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Sphinxcontrib-Proof.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Previews of statements (see option ``proof_html_previews``).
+
+When a document is written, the HTML of its statements (except proofs) is
+captured by the translator (see :func:`store`), and written (see
+:func:`save`) into file ``_proof/previews/PAGE.json`` of the output directory,
+where ``PAGE`` is the URI of the document (``index.html`` being appended to
+URIs of directories). This file is a JSON object with two keys:
+
+- ``statements``: the list of the HTML of statements;
+- ``anchors``: an object mapping anchors of statements (their ids and the ids
+  of their labels) to their index in ``statements``.
+
+Thus, to display the preview of a link, a script (see
+``doc/_static/proof-preview.js``) only downloads the (small) file of the
+target document, instead of the target page itself.
+"""
+
+import json
+import os
+
+from sphinx.util.osutil import ensuredir
+
+DIRECTORY = "_proof/previews"
+
+# Builders writing previews
+BUILDERS = ["html", "dirhtml"]
+
+
+def is_enabled(builder):
+    """Return ``True`` iff `builder` writes previews."""
+    return builder.name in BUILDERS and builder.config.proof_html_previews
+
+
+def get_filename(builder, docname):
+    """Return the path of the previews of `docname` (relative to output directory)."""
+    uri = builder.get_target_uri(docname)
+    if uri == "" or uri.endswith("/"):
+        uri += "index.html"
+    return f"{DIRECTORY}/{uri}.json"
+
+
+def store(writer, node, fragment):
+    """Store `fragment`, the HTML of `node` (a statement)."""
+    if node["thmtype"] == "proof":
+        return
+    docname = writer.builder.current_docname
+    domain = writer.builder.env.get_domain("proof")
+    statement = domain.statements.get(docname, {}).get(node["ids"][0])
+    if statement is None:
+        return
+    previews = writer.builder.__dict__.setdefault("proof_previews", {}).setdefault(
+        docname, {"statements": [], "anchors": {}}
+    )
+    for anchor in [statement.node_id] + [
+        domain.labels[label][2] for label in statement.labels
+    ]:
+        previews["anchors"][anchor] = len(previews["statements"])
+    previews["statements"].append(fragment)
+
+
+def save(app, pagename, templatename, context, doctree):
+    """Write the previews of the statements of document `pagename`.
+
+    If the document no longer contains any statement, its previews are removed.
+    """
+    # pylint: disable=unused-argument
+    if doctree is None or not is_enabled(app.builder):
+        return
+    previews = app.builder.__dict__.get("proof_previews", {}).pop(pagename, None)
+    filename = os.path.join(app.outdir, get_filename(app.builder, pagename))
+    if previews is None:
+        if os.path.exists(filename):
+            os.remove(filename)
+        return
+    ensuredir(os.path.dirname(filename))
+    with open(filename, mode="w", encoding="utf8") as file:
+        json.dump(previews, file, ensure_ascii=False, separators=(",", ":"))
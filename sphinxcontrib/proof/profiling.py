@@ -0,0 +1,245 @@
+# Copyright 2015-2025 Louis Paternault
+#
+# Sphinxcontrib-Proof is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sphinxcontrib-Proof is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Sphinxcontrib-Proof.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Measure the time spent in this extension (see option ``proof_profile``).
+
+When profiling is disabled, nothing in this module is used, so that it has no
+cost at all. When it is enabled, directives, visitors, and title templates
+are replaced by wrappers measuring their execution time.
+
+Measures are stored in the environment (so that measures of parallel reading
+processes are merged into the main process), and reported at the end of the
+build. Timings are inclusive: the time spent parsing a statement includes
+the time spent parsing the statements nested inside it.
+"""
+
+import functools
+import json
+import os
+import time
+
+from sphinx.util import logging
+
+LOGGER = logging.getLogger(__name__)
+
+REPORT_FILENAME = "proof_profile.json"
+
+
+def record(env, name, docname, thmtype, duration):
+    """Record that `name` was run once, in `duration` seconds."""
+    stats = env.proof_profile.setdefault((name, docname, thmtype), [0, 0.0])
+    stats[0] += 1
+    stats[1] += duration
+
+
+def _translator_docname(translator):
+    """Return the name of the document being written by `translator`."""
+    # HTML translators have `docnames`, LaTeX translators have `curfilestack`
+    for attribute in ("docnames", "curfilestack"):
+        stack = getattr(translator, attribute, None)
+        if stack:
+            return stack[-1]
+    return getattr(translator.builder, "current_docname", "")
+
+
+def _node_thmtype(node):
+    """Return the theorem type of a statement node, or of its parent."""
+    if "thmtype" in node:
+        return node["thmtype"]
+    return node.parent.get("thmtype", "") if node.parent else ""
+
+
+def profile_directive(directive):
+    """Return a subclass of `directive`, which measures parsing time."""
+
+    class ProfiledDirective(directive):
+        """Statement environment, measuring the time it spends parsing."""
+
+        def _record(self, name, duration):
+            record(
+                self.env,
+                name,
+                self.env.docname,
+                self.name[len("proof:") :],
+                duration,
+            )
+
+        def run(self):
+            """Render this environment, measuring time."""
+            start = time.perf_counter()
+            try:
+                return super().run()
+            finally:
+                self._record("StatementEnvironment.run", time.perf_counter() - start)
+
+        def parse_content(self, node):
+            """Parse content of this environment, measuring time."""
+            start = time.perf_counter()
+            try:
+                return super().parse_content(node)
+            finally:
+                self._record("nested_parse", time.perf_counter() - start)
+
+    return ProfiledDirective
+
+
+def profile_visitor(function):
+    """Return a wrapper of visitor `function`, measuring its execution time."""
+
+    @functools.wraps(function)
+    def wrapper(self, node):
+        start = time.perf_counter()
+        try:
+            return function(self, node)
+        finally:
+            record(
+                self.builder.env,
+                function.__name__,
+                _translator_docname(self),
+                _node_thmtype(node),
+                time.perf_counter() - start,
+            )
+
+    return wrapper
+
+
+def profile_title_template(get_title_template):
+    """Return a wrapper of `get_title_template()`, measuring template rendering."""
+
+    @functools.wraps(get_title_template)
+    def wrapper(builder, source):
+        render = get_title_template(builder, source)
+        # Templates get human readable theorem types
+        thmtypes = {
+            text: thmtype
+            for thmtype, text in builder.config.proof_theorem_types.items()
+        }
+
+        def profiled_render(**kwargs):
+            start = time.perf_counter()
+            try:
+                return render(**kwargs)
+            finally:
+                record(
+                    builder.env,
+                    "render_title_template",
+                    getattr(builder, "current_docname", ""),
+                    thmtypes.get(kwargs.get("thmtype"), ""),
+                    time.perf_counter() - start,
+                )
+
+        return profiled_render
+
+    return wrapper
+
+
+def instrument(app, module):
+    """Replace functions of `module` (the main module) by measuring wrappers."""
+    get_title_template = module.get_title_template
+    module.get_title_template = profile_title_template(get_title_template)
+
+    for node, handlers in module.TRANSLATION_HANDLERS.items():
+        app.add_node(
+            node,
+            override=True,
+            **{
+                builder: (profile_visitor(visit), profile_visitor(depart))
+                for builder, (visit, depart) in handlers.items()
+            },
+        )
+
+    def restore(app, exception):  # pylint: disable=unused-argument
+        module.get_title_template = get_title_template
+
+    app.connect("builder-inited", reset)
+    app.connect("env-merge-info", merge)
+    app.connect("build-finished", report)
+    app.connect("build-finished", restore, priority=900)
+
+
+def reset(app):
+    """Forget measures of previous builds."""
+    app.env.proof_profile = {}
+
+
+def merge(app, env, docnames, other):
+    """Merge measures of a parallel reading process."""
+    # pylint: disable=unused-argument
+    # The process was forked after earlier chunks were merged: only measures of
+    # the documents it has read are new.
+    for key, (count, duration) in other.proof_profile.items():
+        if key[1] not in docnames:
+            continue
+        stats = env.proof_profile.setdefault(key, [0, 0.0])
+        stats[0] += count
+        stats[1] += duration
+
+
+def _aggregate(profile, index):
+    """Sum measures of `profile`, grouped by `key[index]`."""
+    total = {}
+    for key, (count, duration) in profile.items():
+        stats = total.setdefault(key[index], {}).setdefault(
+            key[0], {"count": 0, "time": 0.0}
+        )
+        stats["count"] += count
+        stats["time"] += duration
+    return total
+
+
+def report(app, exception):
+    """Log a summary of measures, and write all of them as JSON."""
+    if exception is not None:
+        return
+    profile = app.env.proof_profile
+
+    functions = {}
+    for (name, _docname, _thmtype), (count, duration) in profile.items():
+        stats = functions.setdefault(name, {"count": 0, "time": 0.0})
+        stats["count"] += count
+        stats["time"] += duration
+    documents = _aggregate(profile, 1)
+    types = _aggregate(profile, 2)
+
+    LOGGER.info("sphinxcontrib.proof profile:")
+    LOGGER.info("%-40s %10s %12s %12s", "function", "calls", "total (s)", "mean (µs)")
+    for name, stats in sorted(
+        functions.items(), key=lambda item: item[1]["time"], reverse=True
+    ):
+        LOGGER.info(
+            "%-40s %10d %12.3f %12.1f",
+            name,
+            stats["count"],
+            stats["time"],
+            1e6 * stats["time"] / stats["count"],
+        )
+    LOGGER.info("%-40s %10s %12s", "theorem type", "calls", "total (s)")
+    for thmtype, stats in sorted(types.items()):
+        LOGGER.info(
+            "%-40s %10d %12.3f",
+            thmtype or "-",
+            sum(item["count"] for item in stats.values()),
+            sum(item["time"] for item in stats.values()),
+        )
+
+    filename = os.path.join(app.outdir, REPORT_FILENAME)
+    with open(filename, mode="w", encoding="utf8") as file:
+        json.dump(
+            {"functions": functions, "documents": documents, "types": types},
+            file,
+            indent=2,
+            sort_keys=True,
+        )
+    LOGGER.info("Complete profile written to %s.", filename)
@@ -0,0 +1,318 @@
+# Copyright 2015-2025 Louis Paternault
+#
+# Sphinxcontrib-Proof is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sphinxcontrib-Proof is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Sphinxcontrib-Proof.  If not, see <http://www.gnu.org/licenses/>.
+
+"""List the statements of a Sphinx project, without building it.
+
+Source files are scanned line by line (they are not parsed by docutils), in
+parallel, looking for directives of theorem types (read from option
+``proof_theorem_types`` of ``conf.py``), and for the labels (``.. _label:``)
+preceding them. Each statement is printed as a line of JSON::
+
+    {"file": "algebra.rst", "docname": "algebra", "line": 12,
+     "type": "theorem", "title": "Lagrange", "labels": ["lagrange"]}
+
+With option ``--index``, the result is also stored into an index file, and
+only files modified since the index was written are scanned again.
+
+Example::
+
+    python -m sphinxcontrib.proof.scan doc --index .proof-index.json
+
+This is a fast approximation of what Sphinx reads: directives generated by
+other directives, or included from other files, are not found; directives
+inside literal blocks and comments are ignored.
+"""
+
+import argparse
+import concurrent.futures
+import functools
+import json
+import os
+import pathlib
+import re
+import sys
+
+from docutils.nodes import fully_normalize_name
+from sphinx.config import eval_config_file
+from sphinx.util.matching import Matcher
+from sphinx.util.tags import Tags
+
+INDEX_VERSION = 1
+
+# Directives whose content is not parsed as reStructuredText
+LITERAL_DIRECTIVES = ["code", "code-block", "math", "raw", "sourcecode"]
+
+TARGET = re.compile(r"^\s*\.\.\s+_(`[^`]+`|[^`:]+):\s*$")
+DIRECTIVE = re.compile(r"^\s*\.\.\s+([\w:.+-]+)::")
+COMMENT = re.compile(r"^\s*\.\.(\s|$)")
+
+
+def read_config(confdir):
+    """Return the theorem types, source suffixes and exclude patterns."""
+    # pylint: disable=import-outside-toplevel, cyclic-import
+    from . import PROOF_THEOREM_TYPES
+
+    namespace = eval_config_file(pathlib.Path(confdir, "conf.py").resolve(), Tags())
+
+    source_suffix = namespace.get("source_suffix", {".rst": "restructuredtext"})
+    if isinstance(source_suffix, str):
+        suffixes = [source_suffix]
+    elif isinstance(source_suffix, dict):
+        suffixes = [
+            suffix
+            for suffix, filetype in source_suffix.items()
+            if filetype in (None, "restructuredtext")
+        ]
+    else:
+        suffixes = list(source_suffix)
+
+    return (
+        sorted(namespace.get("proof_theorem_types", PROOF_THEOREM_TYPES)),
+        suffixes,
+        list(namespace.get("exclude_patterns", [])),
+    )
+
+
+def find_sources(srcdir, suffixes, exclude_patterns):
+    """Iterate over the paths (relative to `srcdir`) of source files."""
+    matcher = Matcher(exclude_patterns)
+    for root, dirs, files in os.walk(srcdir, followlinks=True):
+        relroot = os.path.relpath(root, srcdir)
+        relroot = "" if relroot == os.curdir else relroot
+        dirs[:] = sorted(
+            directory
+            for directory in dirs
+            if not matcher(os.path.join(relroot, directory).replace(os.sep, "/"))
+        )
+        for filename in sorted(files):
+            path = os.path.join(relroot, filename).replace(os.sep, "/")
+            if filename.endswith(tuple(suffixes)) and not matcher(path):
+                yield path
+
+
+@functools.lru_cache(maxsize=None)
+def _statement_regexp(thmtypes):
+    """Return the regular expression matching directives of `thmtypes`."""
+    types = "|".join(re.escape(thmtype) for thmtype in thmtypes)
+    return re.compile(
+        rf"^(?P<indent>\s*)\.\.\s+proof:(?P<type>{types})::(?:\s+(?P<title>.*?))?\s*$"
+    )
+
+
+def _indentation(line):
+    """Return the indentation of `line`."""
+    return len(line) - len(line.lstrip())
+
+
+def scan_lines(lines, thmtypes):
+    """Return the statements found in `lines`.
+
+    Statements are ``[line, type, title, labels]`` lists (line numbers start
+    at 1).
+    """
+    # pylint: disable=too-many-branches
+    statement_regexp = _statement_regexp(tuple(thmtypes))
+    statements = []
+    labels = []
+    skip = None  # Indentation of the literal block (or comment) being skipped
+    title = None  # Indentation of the statement whose title is being read
+    for number, line in enumerate(lines, 1):
+        line = line.rstrip("\r\n")
+        if not line.strip():
+            title = None
+            continue
+        indent = _indentation(line)
+        if skip is not None:
+            if indent > skip:
+                continue
+            skip = None
+        if title is not None:
+            if indent > title:
+                # Title is written on several lines
+                statements[-1][2] = f"{statements[-1][2]} {line.strip()}".strip()
+                continue
+            title = None
+
+        match = statement_regexp.match(line)
+        if match:
+            statements.append([number, match["type"], match["title"] or "", labels])
+            title, labels = len(match["indent"]), []
+            continue
+        match = TARGET.match(line)
+        if match:
+            labels.append(fully_normalize_name(match.group(1).strip("`")))
+            continue
+        labels = []
+        match = DIRECTIVE.match(line)
+        if match:
+            if match.group(1) in LITERAL_DIRECTIVES:
+                skip = indent
+        elif COMMENT.match(line) or line.endswith("::"):
+            # Comment, or paragraph followed by a literal block
+            skip = indent
+    return statements
+
+
+def scan_file(srcdir, path, thmtypes):
+    """Return the statements of source file `path` (relative to `srcdir`).
+
+    Return a tuple ``(path, mtime, statements)``, where statements are
+    dictionaries, ready to be dumped as JSON.
+    """
+    fullpath = os.path.join(srcdir, path)
+    mtime = os.stat(fullpath).st_mtime_ns
+    docname = os.path.splitext(path)[0]
+    with open(fullpath, encoding="utf8", errors="replace") as file:
+        statements = [
+            {
+                "file": path,
+                "docname": docname,
+                "line": line,
+                "type": thmtype,
+                "title": title,
+                "labels": labels,
+            }
+            for line, thmtype, title, labels in scan_lines(file, thmtypes)
+        ]
+    return path, mtime, statements
+
+
+def load_index(filename, thmtypes):
+    """Return the files of index `filename` (if it exists and is compatible)."""
+    try:
+        with open(filename, encoding="utf8") as file:
+            index = json.load(file)
+    except (OSError, ValueError):
+        return {}
+    if index.get("version") != INDEX_VERSION or index.get("types") != thmtypes:
+        return {}
+    return index.get("files", {})
+
+
+def dump_index(filename, thmtypes, files):
+    """Write index `filename`."""
+    with open(f"{filename}.tmp", mode="w", encoding="utf8") as file:
+        json.dump(
+            {"version": INDEX_VERSION, "types": thmtypes, "files": files},
+            file,
+            separators=(",", ":"),
+        )
+    os.replace(f"{filename}.tmp", filename)
+
+
+def scan(srcdir, thmtypes, paths, *, jobs=None, index=None):
+    """Scan source files, and return a dictionary ``{path: [mtime, statements]}``.
+
+    :param list paths: Files to scan (relative to `srcdir`).
+    :param int jobs: Number of processes (``None`` means the number of CPUs).
+    :param dict index: Previous result: files whose modification time did
+        not change are not scanned again.
+    """
+    index = index or {}
+    files = {}
+    outdated = []
+    for path in paths:
+        try:
+            mtime = os.stat(os.path.join(srcdir, path)).st_mtime_ns
+        except OSError:
+            continue
+        if path in index and index[path][0] == mtime:
+            files[path] = index[path]
+        else:
+            outdated.append(path)
+
+    worker = functools.partial(scan_file, srcdir, thmtypes=thmtypes)
+    if jobs == 1 or len(outdated) < 2:
+        results = list(map(worker, outdated))
+    else:
+        jobs = jobs or os.cpu_count() or 1
+        with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = list(
+                executor.map(
+                    worker, outdated, chunksize=max(1, len(outdated) // (4 * jobs))
+                )
+            )
+    for path, mtime, statements in results:
+        files[path] = [mtime, statements]
+    return {path: files[path] for path in sorted(files)}
+
+
+def commandline_parser():
+    """Return a command line parser."""
+    parser = argparse.ArgumentParser(
+        prog="python -m sphinxcontrib.proof.scan",
+        description=(
+            "List statements of a Sphinx project (without building it), "
+            "as lines of JSON."
+        ),
+    )
+    parser.add_argument("srcdir", help="source directory")
+    parser.add_argument(
+        "-c",
+        "--confdir",
+        help="directory containing conf.py (default: source directory)",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="number of processes (default: number of CPUs)",
+    )
+    parser.add_argument(
+        "-i",
+        "--index",
+        help=(
+            "index file: only files modified since it was written are scanned "
+            "(it is created or updated)"
+        ),
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=argparse.FileType("w", encoding="utf8"),
+        default=sys.stdout,
+        help="output file (default: standard output)",
+    )
+    return parser
+
+
+def main(argv=None):
+    """Main function."""
+    options = commandline_parser().parse_args(argv)
+    thmtypes, suffixes, exclude_patterns = read_config(
+        options.confdir or options.srcdir
+    )
+
+    index = load_index(options.index, thmtypes) if options.index else {}
+    files = scan(
+        options.srcdir,
+        thmtypes,
+        list(find_sources(options.srcdir, suffixes, exclude_patterns)),
+        jobs=options.jobs,
+        index=index,
+    )
+    if options.index:
+        dump_index(options.index, thmtypes, files)
+
+    for _mtime, statements in files.values():
+        for statement in statements:
+            options.output.write(json.dumps(statement, ensure_ascii=False))
+            options.output.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+# Copyright 2015-2025 Louis Paternault
+#
+# Sphinxcontrib-Proof is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sphinxcontrib-Proof is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Sphinxcontrib-Proof.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Search index of statements (see option ``proof_html_search``).
+
+At the end of HTML builds, statements are indexed into directory
+``_proof/search`` of the output directory:
+
+- Statements are numbered (in document order), and stored, by chunks of
+  :data:`CHUNK_SIZE`, in files ``statements/N.json`` (where ``N`` is the
+  index of the chunk). Each file is a list of
+  ``[type, number, title, first sentence, URI]`` (URIs are relative to the
+  output directory, and use the label of the statement as anchor, if any).
+- Words of statements (type, number, title, labels, and first sentence) are
+  stored in shards ``PREFIX.json``, named after their first two characters.
+  Each shard is a JSON object mapping words to the sorted list of indexes of
+  statements containing them.
+
+Thus, a search widget (see ``doc/_static/proof-search.js``) only downloads
+the shards of the words being searched, and the chunks of the statements it
+displays. Shards only contain integers, so that they stay small even for
+common words.
+"""
+
+import json
+import os
+import re
+import shutil
+
+from docutils import nodes
+from sphinx.util.osutil import ensuredir
+
+DIRECTORY = "_proof/search"
+
+# Builders writing a search index
+BUILDERS = ["html", "dirhtml"]
+
+# Length of the prefix of words used to name shards
+PREFIX_LENGTH = 2
+
+# Number of statements per file
+CHUNK_SIZE = 64
+
+# Maximum length of summaries (in characters)
+SUMMARY_LENGTH = 200
+
+SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+WORD = re.compile(r"\w+")
+SHARD_NAME = re.compile(r"[a-z0-9]+")
+
+
+def summarize(content):
+    """Return the first sentence of `content` (the content of a statement)."""
+    for paragraph in content.findall(nodes.paragraph):
+        text = " ".join(paragraph.astext().split())
+        if text:
+            break
+    else:
+        return ""
+    text = SENTENCE_END.split(text, 1)[0]
+    if len(text) > SUMMARY_LENGTH:
+        text = text[: SUMMARY_LENGTH - 1].rstrip() + "…"
+    return text
+
+
+def tokenize(*texts):
+    """Return the set of (lowercase) words of `texts`."""
+    return {word for text in texts for word in WORD.findall(text.lower())}
+
+
+def shard_name(word):
+    """Return the name of the shard of `word`.
+
+    Non-ASCII prefixes are hex-encoded, to get portable file names.
+    """
+    prefix = word[:PREFIX_LENGTH]
+    if SHARD_NAME.fullmatch(prefix):
+        return prefix
+    return "x" + prefix.encode("utf8").hex()
+
+
+def build(app):
+    """Return the search index, as a tuple ``(shards, records)``."""
+    domain = app.env.get_domain("proof")
+    thmtypes = app.config.proof_theorem_types
+    summaries = domain.data["summaries"]
+
+    shards = {}
+    records = []
+    for docname, node_id in domain.get_statement_list():
+        statement = domain.statements[docname][node_id]
+        record = [
+            thmtypes.get(statement.thmtype, statement.thmtype),
+            ".".join(map(str, statement.number or ())),
+            statement.title,
+            summaries.get(docname, {}).get(node_id, ""),
+            f"{app.builder.get_target_uri(docname)}"
+            f"#{domain.get_anchor(docname, node_id)}",
+        ]
+        for word in tokenize(*record[:4], *statement.labels):
+            shards.setdefault(shard_name(word), {}).setdefault(word, []).append(
+                len(records)
+            )
+        records.append(record)
+    return shards, records
+
+
+def _write(filename, data):
+    """Write `data` as compact JSON into `filename`."""
+    with open(filename, mode="w", encoding="utf8") as file:
+        json.dump(data, file, ensure_ascii=False, separators=(",", ":"))
+
+
+def dump(app, exception):
+    """Write the search index of statements."""
+    if (
+        exception is not None
+        or app.builder.name not in BUILDERS
+        or not app.config.proof_html_search
+    ):
+        return
+    directory = os.path.join(app.outdir, DIRECTORY)
+    shutil.rmtree(directory, ignore_errors=True)
+    ensuredir(os.path.join(directory, "statements"))
+
+    shards, records = build(app)
+    for name, shard in shards.items():
+        _write(os.path.join(directory, f"{name}.json"), shard)
+    for start in range(0, len(records), CHUNK_SIZE):
+        _write(
+            os.path.join(directory, "statements", f"{start // CHUNK_SIZE}.json"),
+            records[start : start + CHUNK_SIZE],
+        )
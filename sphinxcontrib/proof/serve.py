@@ -0,0 +1,685 @@
+# Copyright 2015-2025 Louis Paternault
+#
+# Sphinxcontrib-Proof is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sphinxcontrib-Proof is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Sphinxcontrib-Proof.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Live preview of a Sphinx project, updating statements as they are edited.
+
+The project is built (using the ``html`` builder), and its output directory
+is served over HTTP. Source files are then watched:
+
+- if the only changes of a source file are inside some statements, only those
+  statements are parsed again (the rest of the document is not read), resolved
+  and rendered (see :meth:`Preview.render`), and their HTML is pushed (using
+  server-sent events) to the open pages of this document, which replace the
+  statements in place;
+- after a short delay without any change (or immediately, for changes which
+  cannot be handled this way), the project is built again (incrementally), so
+  that the output directory, and the documents depending on the changes
+  (references, lists, etc.), are up to date. Open pages written by this build
+  are reloaded (unless their statements have just been pushed).
+
+Example::
+
+    python -m sphinxcontrib.proof.serve doc doc/_build/preview
+"""
+
+import argparse
+import collections
+import functools
+import http.server
+import json
+import os
+import queue
+import sys
+import textwrap
+import threading
+import time
+import traceback
+
+from docutils.parsers.rst import Parser
+from docutils.transforms import references
+from sphinx.application import Sphinx
+from sphinx.transforms import (
+    AutoNumbering,
+    DefaultSubstitutions,
+    FilterSystemMessages,
+    HandleCodeBlocks,
+    SphinxSmartQuotes,
+    SphinxTransformer,
+)
+from sphinx.util import logging, rst
+from sphinx.util.docutils import LoggingReporter, new_document, sphinx_domains
+from sphinx.util.osutil import relative_uri
+
+from . import _StatementNode, dependencies, scan
+
+LOGGER = logging.getLogger(__name__)
+
+EVENTS_PATH = "/_proof/events"
+SCRIPT_PATH = "/_proof/serve.js"
+
+# Transforms applied to statements parsed again. Transforms recording
+# information into the environment (e.g. domains processing documents) are
+# not applied: the environment is only updated by actual builds.
+TRANSFORMS = [
+    references.Substitutions,
+    references.PropagateTargets,
+    references.AnonymousHyperlinks,
+    references.IndirectHyperlinks,
+    references.Footnotes,
+    references.ExternalTargets,
+    references.InternalTargets,
+    references.DanglingReferences,
+    AutoNumbering,
+    DefaultSubstitutions,
+    FilterSystemMessages,
+    HandleCodeBlocks,
+    SphinxSmartQuotes,
+]
+
+JAVASCRIPT = """\
+(function () {
+  "use strict";
+  const docname = document.currentScript.dataset.docname;
+  const events = new EventSource("%(events)s");
+  events.addEventListener("statement", function (event) {
+    const data = JSON.parse(event.data);
+    if (data.docname !== docname) {
+      return;
+    }
+    const element = document.getElementById(data.id);
+    if (element === null) {
+      location.reload();
+      return;
+    }
+    const template = document.createElement("template");
+    template.innerHTML = data.html;
+    const statement = template.content.firstElementChild;
+    element.replaceWith(template.content);
+    if (window.MathJax && MathJax.typesetPromise) {
+      MathJax.typesetPromise([statement]);
+    }
+  });
+  events.addEventListener("error", function (event) {
+    console.error("Preview: " + JSON.parse(event.data).message);
+  });
+  events.addEventListener("reload", function (event) {
+    const docnames = JSON.parse(event.data).docnames;
+    if (docnames === null || docnames.includes(docname)) {
+      location.reload();
+    }
+  });
+})();
+""" % {"events": EVENTS_PATH}
+
+Block = collections.namedtuple("Block", ["line", "text", "types"])
+Block.__doc__ = """Top-level statement of a source file.
+
+- ``line``: line number of the directive (starting at 1);
+- ``text``: source of the statement (directive and content);
+- ``types``: types of the statement, and of the statements it contains.
+"""
+
+
+def _indentation(line):
+    """Return the indentation of `line`."""
+    return len(line) - len(line.lstrip())
+
+
+@functools.lru_cache(maxsize=64)
+def split_blocks(text, thmtypes):
+    """Split `text` into statements, and the text outside statements.
+
+    Return a tuple ``(outside, blocks)``, where ``blocks`` is a tuple of
+    :class:`Block` (top-level statements), and ``outside`` is the tuple of the
+    other lines (where each statement is replaced by ``None``).
+    """
+    lines = text.splitlines()
+    spans = []
+    for line, thmtype, _title, _labels in scan.scan_lines(lines, thmtypes):
+        if spans and line <= spans[-1][1]:
+            # Statement nested in the previous one
+            spans[-1][2].append(thmtype)
+            continue
+        indent = _indentation(lines[line - 1])
+        end = line
+        while end < len(lines) and (
+            not lines[end].strip() or _indentation(lines[end]) > indent
+        ):
+            end += 1
+        while not lines[end - 1].strip():
+            end -= 1
+        spans.append([line, end, [thmtype]])
+
+    outside = []
+    blocks = []
+    previous = 0
+    for line, end, types in spans:
+        outside.extend(lines[previous : line - 1])
+        outside.append(None)
+        blocks.append(Block(line, "\n".join(lines[line - 1 : end]), tuple(types)))
+        previous = end
+    outside.extend(lines[previous:])
+    return tuple(outside), tuple(blocks)
+
+
+class Events:
+    """Server-sent events, broadcast to every open page."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queues = set()
+
+    def subscribe(self):
+        """Return a new queue, receiving every event."""
+        events = queue.Queue()
+        with self._lock:
+            self._queues.add(events)
+        return events
+
+    def unsubscribe(self, events):
+        """Stop sending events to `events`."""
+        with self._lock:
+            self._queues.discard(events)
+
+    def send(self, event, data):
+        """Send `event` (with JSON `data`) to every open page."""
+        message = f"event: {event}\ndata: {json.dumps(data)}\n\n".encode("utf8")
+        with self._lock:
+            for events in self._queues:
+                events.put(message)
+
+
+class Preview:
+    """Build the project, and push statements changed since the last build."""
+
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(self, options, events):
+        self.options = options
+        self.events = events
+        self.app = None
+        # Source of documents, as read by the last build
+        self.sources = {}
+        # Source of documents, as last pushed
+        self.pushed = {}
+        # Ids of statements of documents, as read by the last build
+        self.ids = {}
+        # Documents read and written by the current build
+        self.read = set()
+        self.written = set()
+        self.building = False
+
+    def create(self):
+        """Create the Sphinx application (again)."""
+        options = self.options
+        overrides = dict(options.define)
+        # Lazily loaded content would not be updated
+        overrides.setdefault("proof_html_lazy_types", [])
+        self.app = Sphinx(
+            options.srcdir,
+            options.confdir or options.srcdir,
+            options.outdir,
+            options.doctreedir or os.path.join(options.outdir, ".doctrees"),
+            "html",
+            confoverrides=overrides,
+            status=None if options.quiet else sys.stdout,
+            warning=sys.stderr,
+            parallel=options.jobs,
+        )
+        self.app.connect("env-before-read-docs", self._record_read)
+        self.app.connect("doctree-resolved", self._record_written)
+        self.sources = {}
+
+    def _record_read(self, app, env, docnames):
+        # pylint: disable=unused-argument
+        self.read.update(docnames)
+
+    def _record_written(self, app, doctree, docname):
+        # pylint: disable=unused-argument
+        if self.building:
+            self.written.add(docname)
+
+    def build(self):
+        """Build the project (incrementally).
+
+        Return the documents written by this build.
+        """
+        self.read, self.written = set(), set()
+        self.building = True
+        try:
+            self.app.build()
+        finally:
+            self.building = False
+        env = self.app.env
+        for docname in list(self.sources):
+            if docname not in env.found_docs or docname in self.read:
+                del self.sources[docname]
+        for docname in env.found_docs:
+            if docname not in self.sources:
+                self.sources[docname] = self.read_source(docname)
+                self.ids.pop(docname, None)
+        self.pushed = dict(self.sources)
+        return self.written
+
+    def get_path(self, docname):
+        """Return the path of the source of `docname`."""
+        return str(self.app.env.doc2path(docname))
+
+    def read_source(self, docname):
+        """Return the source of `docname` (or ``None`` if it cannot be read)."""
+        try:
+            with open(
+                self.get_path(docname),
+                encoding=self.app.env.settings.get("input_encoding", "utf-8-sig"),
+            ) as file:
+                return file.read()
+        except (OSError, UnicodeDecodeError):
+            return None
+
+    def update(self, docname):
+        """Push the statements of `docname` which changed since they were pushed.
+
+        Return ``False`` if `docname` has other changes (it has to be built
+        again).
+        """
+        text = self.read_source(docname)
+        if text is None or self.sources.get(docname) is None:
+            return False
+        if text == self.pushed.get(docname):
+            return True
+        thmtypes = tuple(self.app.config.proof_theorem_types)
+        outside, blocks = split_blocks(text, thmtypes)
+        built_outside, built_blocks = split_blocks(self.sources[docname], thmtypes)
+        if outside != built_outside or [block.types for block in blocks] != [
+            block.types for block in built_blocks
+        ]:
+            return False
+        statements = self.app.env.get_domain("proof").statements.get(docname, {})
+        if [statement.thmtype for statement in statements.values()] != [
+            thmtype for block in built_blocks for thmtype in block.types
+        ]:
+            # Some statements were not found by the scanner
+            return False
+
+        index = 0
+        for block, pushed in zip(
+            blocks, split_blocks(self.pushed[docname], thmtypes)[1]
+        ):
+            if block.text != pushed.text and not self.push(docname, block, index):
+                return False
+            index += len(block.types)
+        self.pushed[docname] = text
+        return True
+
+    def push(self, docname, block, index):
+        """Render `block` (statement number `index` of `docname`), and push it.
+
+        Return ``False`` if the statement cannot be rendered alone.
+        """
+        begin = time.perf_counter()
+        rendered = self.render(docname, block, index)
+        if rendered is None:
+            return False
+        node_id, html = rendered
+        self.events.send("statement", {"docname": docname, "id": node_id, "html": html})
+        LOGGER.info(
+            "%s:%d: statement updated (%d ms)",
+            self.get_path(docname),
+            block.line,
+            1000 * (time.perf_counter() - begin),
+        )
+        return True
+
+    def get_ids(self, docname):
+        """Return the ids of the statements of `docname` (in document order)."""
+        if docname not in self.ids:
+            self.ids[docname] = [
+                list(node["ids"])
+                for node in self.app.env.get_doctree(docname).findall(_StatementNode)
+            ]
+        return self.ids[docname]
+
+    def parse(self, docname, source):
+        """Parse `source` (part of document `docname`), and return its doctree."""
+        app = self.app
+        env = app.env
+        path = self.get_path(docname)
+        env.prepare_settings(docname)
+        document = new_document(path)
+        document.reporter = LoggingReporter(path)
+        for key, value in env.settings.items():
+            setattr(document.settings, key, value)
+        document.settings.env = env
+        transformer = SphinxTransformer(document)
+        transformer.set_environment(env)
+        transformer.add_transforms(TRANSFORMS)
+        document.transformer = transformer
+        try:
+            with sphinx_domains(env), rst.default_role(
+                docname, app.config.default_role
+            ):
+                Parser().parse(source, document)
+                transformer.apply_transforms()
+        finally:
+            env.temp_data.clear()
+            env.ref_context.clear()
+        return document
+
+    def render(self, docname, block, index):
+        """Render `block`, the statement number `index` of `docname`.
+
+        Return a tuple ``(node_id, html)``, or ``None`` if the statement
+        cannot be rendered alone.
+        """
+        app = self.app
+        env = app.env
+        # Line numbers of warnings are the ones of the source file
+        document = self.parse(
+            docname, "\n" * (block.line - 1) + textwrap.dedent(block.text)
+        )
+        for node in document.findall(dependencies.DependenciesNode):
+            if node["label"] is None:
+                # Dependencies of the edited statement are only known once
+                # its document has been read again
+                return None
+            # As in ProofDomain.process_doc()
+            node["docname"] = docname
+        statements = list(document.findall(_StatementNode))
+        ids = self.get_ids(docname)[index : index + len(block.types)]
+        if len(statements) != len(ids) or len(ids) != len(block.types):
+            return None
+        for node, node_ids in zip(statements, ids):
+            node["ids"] = list(node_ids)
+        env.apply_post_transforms(document, docname)
+
+        # As in StandaloneHTMLBuilder.write_doc()
+        builder = app.builder
+        builder.secnumbers = env.toc_secnumbers.get(docname, {})
+        builder.fignumbers = env.toc_fignumbers.get(docname, {})
+        builder.imgpath = relative_uri(builder.get_target_uri(docname), "_images")
+        builder.dlpath = relative_uri(builder.get_target_uri(docname), "_downloads")
+        builder.current_docname = docname
+        return (
+            statements[0]["ids"][0],
+            builder.render_partial(statements[0])["fragment"],
+        )
+
+    def get_mtimes(self):
+        """Return the modification times of the files the project depends on."""
+        env = self.app.env
+        paths = {os.path.join(self.app.confdir, "conf.py")}
+        for docname in env.found_docs:
+            paths.add(self.get_path(docname))
+            paths.update(
+                os.path.join(self.app.srcdir, dependency)
+                for dependency in env.dependencies.get(docname, ())
+            )
+        mtimes = {}
+        for path in paths:
+            try:
+                mtimes[path] = os.stat(path).st_mtime_ns
+            except OSError:
+                mtimes[path] = None
+        return mtimes
+
+    def get_sources(self):
+        """Return the source files of the project (to find new documents)."""
+        config = self.app.config
+        return set(
+            scan.find_sources(
+                self.app.srcdir,
+                list(config.source_suffix),
+                list(config.exclude_patterns),
+            )
+        )
+
+    def rebuild(self, pushed):
+        """Build the project, and reload the pages written by this build.
+
+        :param pushed: Documents whose changes have been pushed (their pages
+            are not reloaded).
+        """
+        written = self.build() - pushed
+        if written:
+            self.events.send("reload", {"docnames": sorted(written)})
+
+    def watch(self):
+        """Watch source files, and push changes (forever).
+
+        Errors (invalid configuration, exception raised by an extension, etc.)
+        are logged, and sent to open pages, and files are still watched: the
+        changes causing the error are handled again once they are fixed.
+        """
+        mtimes = self.get_mtimes()
+        sources = self.get_sources()
+        pushed = set()
+        deadline = None
+        polls = 0
+        while True:
+            time.sleep(self.options.interval)
+            polls += 1
+            try:
+                mtimes, sources, pushed, deadline = self.poll(
+                    mtimes, sources, pushed, deadline, polls % 20 == 0
+                )
+            except Exception as error:  # pylint: disable=broad-except
+                LOGGER.error("preview failed:\n%s", traceback.format_exc().rstrip())
+                self.events.send(
+                    "error", {"message": f"{type(error).__name__}: {error}"}
+                )
+                mtimes = self.get_mtimes()
+                pushed, deadline = set(), None
+
+    def poll(self, mtimes, sources, pushed, deadline, scan_sources):
+        """Handle the changes of source files since the previous call.
+
+        :param mtimes: Modification times of files (see :meth:`get_mtimes`), as
+            of the previous call.
+        :param sources: Source files of the project, as of the previous call.
+        :param pushed: Documents pushed since the last build.
+        :param deadline: Time at which the project is to be built again (or
+            ``None``).
+        :param scan_sources: Look for documents added or removed.
+
+        Return the new values of ``(mtimes, sources, pushed, deadline)``.
+        """
+        # pylint: disable=too-many-arguments
+        confpath = os.path.join(self.app.confdir, "conf.py")
+        current = self.get_mtimes()
+        changed = {path for path, mtime in current.items() if mtime != mtimes.get(path)}
+        mtimes = current
+        if scan_sources and self.get_sources() != sources:
+            # Documents were added or removed
+            sources = self.get_sources()
+            changed.add(None)
+
+        if confpath in changed:
+            self.create()
+            self.build()
+            self.events.send("reload", {"docnames": None})
+            return self.get_mtimes(), sources, set(), None
+        if changed:
+            docnames = {
+                self.app.env.path2doc(path) for path in changed if path is not None
+            }
+            if None in docnames or not all(
+                self.update(docname) for docname in docnames
+            ):
+                deadline = time.monotonic()
+            else:
+                pushed |= docnames
+                deadline = time.monotonic() + self.options.delay
+        if deadline is not None and time.monotonic() >= deadline:
+            self.rebuild(pushed)
+            return self.get_mtimes(), sources, set(), None
+        return mtimes, sources, pushed, deadline
+
+
+class RequestHandler(http.server.SimpleHTTPRequestHandler):
+    """Serve the output directory, the preview script, and events."""
+
+    events = None
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Serve a GET request."""
+        path = self.path.split("?", 1)[0].split("#", 1)[0]
+        if path == EVENTS_PATH:
+            self.send_events()
+        elif path == SCRIPT_PATH:
+            self.send_content(JAVASCRIPT.encode("utf8"), "text/javascript")
+        elif path.endswith((".html", "/")):
+            self.send_page(path)
+        else:
+            super().do_GET()
+
+    def send_content(self, content, content_type):
+        """Send `content`."""
+        self.send_response(200)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(content)))
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(content)
+
+    def send_page(self, path):
+        """Send an HTML page, loading the preview script."""
+        filename = self.translate_path(path)
+        if os.path.isdir(filename):
+            filename = os.path.join(filename, "index.html")
+            path += "index.html"
+        try:
+            with open(filename, mode="rb") as file:
+                content = file.read()
+        except OSError:
+            self.send_error(404)
+            return
+        docname = path.strip("/")[: -len(".html")]
+        script = (
+            f'<script src="{SCRIPT_PATH}" ' f'data-docname="{docname}"></script></body>'
+        ).encode("utf8")
+        self.send_content(content.replace(b"</body>", script, 1), "text/html")
+
+    def send_events(self):
+        """Send server-sent events, until the page is closed."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        events = self.events.subscribe()
+        try:
+            while True:
+                try:
+                    message = events.get(timeout=15)
+                except queue.Empty:
+                    message = b": keep-alive\n\n"
+                self.wfile.write(message)
+                self.wfile.flush()
+        except OSError:
+            pass
+        finally:
+            self.events.unsubscribe(events)
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        pass
+
+
+def _setting(argument):
+    """Parse an argument of option ``--define``, as ``(name, value)``."""
+    name, equal, value = argument.partition("=")
+    if not (name and equal):
+        raise argparse.ArgumentTypeError(
+            f"{argument!r} is not of the form SETTING=VALUE"
+        )
+    return name, value
+
+
+def commandline_parser():
+    """Return a command line parser."""
+    parser = argparse.ArgumentParser(
+        prog="python -m sphinxcontrib.proof.serve",
+        description=(
+            "Serve a live preview of a Sphinx project, "
+            "updating statements as they are edited."
+        ),
+    )
+    parser.add_argument("srcdir", help="source directory")
+    parser.add_argument("outdir", help="output directory")
+    parser.add_argument(
+        "-c", "--confdir", help="directory of conf.py (default: SRCDIR)"
+    )
+    parser.add_argument(
+        "-d",
+        "--doctreedir",
+        help="directory for doctrees (default: OUTDIR/.doctrees)",
+    )
+    parser.add_argument(
+        "-D",
+        "--define",
+        action="append",
+        default=[],
+        type=_setting,
+        metavar="SETTING=VALUE",
+        help="override a setting of conf.py",
+    )
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=1, help="number of processes of builds"
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="host (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8000, help="port (default: 8000)")
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=0.1,
+        help="delay (in seconds) between two checks of source files (default: 0.1)",
+    )
+    parser.add_argument(
+        "--delay",
+        type=float,
+        default=2,
+        help=(
+            "delay (in seconds) without changes before building the project "
+            "again, once statements have been pushed (default: 2)"
+        ),
+    )
+    parser.add_argument(
+        "-q", "--quiet", action="store_true", help="do not print build progress"
+    )
+    return parser
+
+
+def main(argv=None):
+    """Main function."""
+    options = commandline_parser().parse_args(argv)
+    events = Events()
+    preview = Preview(options, events)
+    preview.create()
+    preview.build()
+    threading.Thread(target=preview.watch, daemon=True).start()
+
+    handler = functools.partial(RequestHandler, directory=options.outdir)
+    RequestHandler.events = events
+    with http.server.ThreadingHTTPServer(
+        (options.host, options.port), handler
+    ) as server:
+        print(f"Serving on http://{options.host}:{options.port}/")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,239 @@
+# Copyright 2015-2025 Louis Paternault
+#
+# Sphinxcontrib-Proof is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sphinxcontrib-Proof is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Sphinxcontrib-Proof.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Permanent tags of statements (see option ``proof_tags``).
+
+Each labelled statement gets a tag: a short identifier (four or more digits
+and uppercase letters, e.g. ``01AZ``), which never changes, and is never
+reused, so that it can be cited. Tags are stored in a text file (option
+``proof_tags_file``), meant to be kept under version control with the
+sources. Each line is a tag, followed by the label it was allocated to::
+
+    0001 lagrange
+    0002 cauchy-theorem
+
+The file is only appended to: tags of removed statements are kept. To rename
+a label while keeping its tag, edit the file.
+
+HTML builders write a page ``tag/TAG/index.html`` for each tag, redirecting to
+the statement.
+"""
+
+import hashlib
+import html
+import os
+import pickle
+import string
+
+from sphinx.util import logging
+from sphinx.util.osutil import ensuredir, relative_uri
+
+LOGGER = logging.getLogger(__name__)
+
+# Builders writing tag pages (and linking to them)
+BUILDERS = ["html", "dirhtml"]
+
+DIGITS = string.digits + string.ascii_uppercase
+TAG_LENGTH = 4
+
+DIRECTORY = "tag"
+
+REDIRECT_TEMPLATE = """<!DOCTYPE html>
+<html>
+  <head>
+    <meta charset="utf-8">
+    <title>Tag {tag}</title>
+    <link rel="canonical" href="{uri}">
+    <meta http-equiv="refresh" content="0; url={uri}">
+  </head>
+  <body>
+    <p>Tag {tag}: <a href="{uri}">{text}</a></p>
+  </body>
+</html>
+"""
+
+
+def format_tag(number):
+    """Return the tag of the `number`-th statement."""
+    tag = ""
+    while number:
+        number, digit = divmod(number, len(DIGITS))
+        tag = DIGITS[digit] + tag
+    return tag.rjust(TAG_LENGTH, "0")
+
+
+def parse_tag(tag):
+    """Return the number of `tag` (inverse of :func:`format_tag`)."""
+    return int(tag, len(DIGITS))
+
+
+class TagDatabase:
+    """Append-only database of tags.
+
+    The whole file is read once (when the object is created). Then, looking
+    up or allocating a tag does not depend on the size of the database.
+    """
+
+    # pylint: disable=too-few-public-methods
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.tags = {}  # label -> tag
+        self.labels = {}  # tag -> label
+        self._last = 0
+        try:
+            with open(filename, encoding="utf8") as file:
+                for number, line in enumerate(file, 1):
+                    if not line.strip() or line.startswith("#"):
+                        continue
+                    try:
+                        tag, label = line.split(None, 1)
+                        self._last = max(self._last, parse_tag(tag))
+                    except ValueError:
+                        LOGGER.warning(
+                            "invalid line in tag database: %r",
+                            line.rstrip("\n"),
+                            location=(filename, number),
+                        )
+                        continue
+                    self.tags[label.strip()] = tag
+                    self.labels[tag] = label.strip()
+        except FileNotFoundError:
+            pass
+
+    def allocate(self, labels):
+        """Allocate tags to those of `labels` which do not have one.
+
+        Return the list of labels which got a new tag.
+        """
+        new = [label for label in labels if label not in self.tags]
+        if not new:
+            return []
+        lines = []
+        for label in new:
+            self._last += 1
+            tag = format_tag(self._last)
+            self.tags[label] = tag
+            self.labels[tag] = label
+            lines.append(f"{tag} {label}\n")
+        with open(self.filename, mode="a", encoding="utf8") as file:
+            file.writelines(lines)
+        return new
+
+
+def get_database(env):
+    """Return the tag database (or ``None`` if tags are disabled).
+
+    It is read once per build.
+    """
+    if not env.config.proof_tags:
+        return None
+    domain = env.get_domain("proof")
+    if domain.tag_database is None:
+        domain.tag_database = TagDatabase(
+            os.path.join(env.srcdir, env.config.proof_tags_file)
+        )
+    return domain.tag_database
+
+
+def allocate(app, env):
+    """Allocate tags to new labelled statements (with HTML builders only).
+
+    Statements are processed in document order (whatever the order in which
+    documents were read), so that the same sources always get the same tags.
+
+    Return the documents containing those statements (which have to be
+    written again to display their tag).
+    """
+    database = get_database(env)
+    if database is None or app.builder.name not in BUILDERS:
+        return []
+    domain = env.get_domain("proof")
+    statements = (
+        domain.statements[docname][node_id]
+        for docname, node_id in domain.get_statement_list()
+    )
+    first_labels = (statement.labels[0] for statement in statements if statement.labels)
+    return sorted(
+        {domain.labels[label][0] for label in database.allocate(first_labels)}
+    )
+
+
+def get_uri(builder, tag):
+    """Return the URI (relative to the output directory) of the page of `tag`."""
+    if builder.name == "dirhtml":
+        return f"{DIRECTORY}/{tag}/"
+    return f"{DIRECTORY}/{tag}/index.html"
+
+
+def get_relative_uri(builder, docname, tag):
+    """Return the URI of the page of `tag`, relative to document `docname`."""
+    return relative_uri(builder.get_target_uri(docname), get_uri(builder, tag))
+
+
+def get_pages(builder, database):
+    """Return the redirection pages of tags, as a dictionary ``{tag: content}``."""
+    domain = builder.env.get_domain("proof")
+    thmtypes = builder.config.proof_theorem_types
+    pages = {}
+    for label, (docname, node_id, labelid) in domain.labels.items():
+        tag = database.tags.get(label)
+        if tag is None:
+            continue
+        statement = domain.statements[docname][node_id]
+        uri = relative_uri(get_uri(builder, tag), builder.get_target_uri(docname))
+        pages[tag] = REDIRECT_TEMPLATE.format(
+            tag=tag,
+            uri=f"{uri}#{labelid}",
+            text=html.escape(
+                domain.statement_name(
+                    statement.title, thmtypes[statement.thmtype], statement.number
+                )
+            ),
+        )
+    return pages
+
+
+def write_pages(app, exception):
+    """Write a redirection page for each tag of an existing statement.
+
+    Digests of written pages are stored in the doctree directory, so that
+    pages which did not change since the last build are not written again.
+    """
+    database = get_database(app.env)
+    if exception is not None or database is None or app.builder.name not in BUILDERS:
+        return
+
+    cachename = os.path.join(app.doctreedir, "proof-tags.pickle")
+    try:
+        with open(cachename, mode="rb") as file:
+            outdir, written = pickle.load(file)
+    except Exception:  # pylint: disable=broad-except
+        outdir, written = None, {}
+    if outdir != app.outdir or not os.path.isdir(os.path.join(app.outdir, DIRECTORY)):
+        written = {}
+
+    digests = {}
+    for tag, content in get_pages(app.builder, database).items():
+        digests[tag] = hashlib.blake2b(content.encode("utf8"), digest_size=8).digest()
+        if written.get(tag) == digests[tag]:
+            continue
+        filename = os.path.join(app.outdir, DIRECTORY, tag, "index.html")
+        ensuredir(os.path.dirname(filename))
+        with open(filename, mode="w", encoding="utf8") as file:
+            file.write(content)
+
+    with open(cachename, mode="wb") as file:
+        pickle.dump((app.outdir, digests), file, protocol=pickle.HIGHEST_PROTOCOL)
@@ -0,0 +1,82 @@
+# Copyright 2015-2025 Louis Paternault
+#
+# Sphinxcontrib-Proof is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sphinxcontrib-Proof is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Sphinxcontrib-Proof.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Fixtures shared by tests: writing and building Sphinx projects."""
+
+import itertools
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+CONF = 'extensions = ["sphinxcontrib.proof"]\nnumfig = True\n'
+
+
+@pytest.fixture(name="project")
+def fixture_project(tmp_path):
+    """Return a function writing a Sphinx project, and returning its directory.
+
+    Its arguments are the files of the project (as a dictionary mapping file
+    names to content, dedented), and the source directory name. If missing,
+    ``conf.py`` only enables this extension (and ``numfig``).
+    """
+
+    def write(files, name="src"):
+        srcdir = tmp_path / name
+        srcdir.mkdir()
+        files = {"conf.py": CONF, **files}
+        for filename, content in files.items():
+            (srcdir / filename).write_text(
+                textwrap.dedent(content).lstrip(), encoding="utf8"
+            )
+        return srcdir
+
+    return write
+
+
+@pytest.fixture(name="build")
+def fixture_build(tmp_path):
+    """Return a function building a Sphinx project (in a separate process).
+
+    Its arguments are the source directory, options of ``sphinx-build``, the
+    builder, and the output directory (if ``None``, a new one, so that the
+    build is not incremental). It returns the output directory, and the
+    warnings.
+    """
+    counter = itertools.count()
+
+    def run(srcdir, *options, builder="html", outdir=None):
+        if outdir is None:
+            outdir = tmp_path / "build" / str(next(counter))
+        process = subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "sphinx",
+                "-b",
+                builder,
+                "-q",
+                *options,
+                str(srcdir),
+                str(outdir),
+            ],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        return outdir, process.stderr
+
+    return run
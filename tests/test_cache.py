@@ -0,0 +1,77 @@
+# Copyright 2015-2025 Louis Paternault
+#
+# Sphinxcontrib-Proof is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sphinxcontrib-Proof is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Sphinxcontrib-Proof.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Cache of parsed statement content (option ``proof_cache``)."""
+
+import textwrap
+
+from conftest import CONF
+
+STATEMENT = """
+.. proof:theorem::
+
+   See :py:func:`f`.
+
+.. proof:lemma::
+
+   Let `x` be a real number.
+"""
+
+
+def test_context(project, build):
+    """Identical statements are parsed in the context of their own document."""
+    srcdir = project(
+        {
+            "conf.py": CONF + 'proof_cache = True\nproof_cache_dir = "cache"\n',
+            "index.rst": textwrap.dedent("""
+                Alpha
+                =====
+
+                .. toctree::
+
+                   other
+
+                .. py:module:: alpha
+
+                .. py:function:: f()
+                """) + STATEMENT,
+            "other.rst": textwrap.dedent("""
+                Beta
+                ====
+
+                .. default-role:: math
+
+                .. py:module:: beta
+
+                .. py:function:: f()
+                """) + STATEMENT,
+        }
+    )
+
+    for options in ((), ("-E",)):
+        outdir, warnings = build(srcdir, *options)
+        assert not warnings
+        alpha = (outdir / "index.html").read_text(encoding="utf8")
+        beta = (outdir / "other.html").read_text(encoding="utf8")
+
+        assert 'href="#alpha.f"' in alpha
+        assert 'href="#beta.f"' in beta
+        assert "alpha.f" not in beta
+
+        assert "<cite>x</cite>" in alpha
+        assert r"\(x\)" in beta
+
+    # The lemma (only) has been cached, once per default role
+    assert len(list((srcdir / "cache").glob("*/*.pickle"))) == 2
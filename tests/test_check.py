@@ -0,0 +1,116 @@
+# Copyright 2015-2025 Louis Paternault
+#
+# Sphinxcontrib-Proof is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sphinxcontrib-Proof is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Sphinxcontrib-Proof.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Builder ``proofcheck``."""
+
+import json
+
+import pytest
+from conftest import CONF
+
+INDEX = """
+Root
+====
+
+.. toctree::
+
+   other
+
+.. _dup:
+
+.. proof:theorem:: One
+
+   See :proof:ref:`nope`.
+
+.. proof:lemma:: Two
+
+   Cites :proof:ref:`later`.
+
+.. proof:include:: missing
+
+.. proof:dependencies:: absent
+
+.. proof:foo:: Unknown
+"""
+
+OTHER = """
+Other
+=====
+
+.. _dup:
+
+.. proof:theorem:: Dup
+
+   Text.
+
+.. _later:
+
+.. proof:theorem:: Later
+
+   Text.
+"""
+
+REPORT = """\
+index.rst:12: [undefined-label] undefined label: 'nope'
+index.rst:14: [forward-dependency] lemma 'Two' cites theorem 'later' ('other'), \
+which appears later
+index.rst:18: [undefined-label] undefined label: 'missing'
+index.rst:20: [undefined-label] undefined label: 'absent'
+index.rst:22: [unknown-type] unknown theorem type: 'foo'
+other.rst:6: [duplicate-label] duplicate label 'dup', other instance in 'index'
+"""
+
+
+@pytest.mark.parametrize("options", [(), ("-j", "2")], ids=["serial", "parallel"])
+def test_report(project, build, options):
+    """Every problem is reported, with its file and line."""
+    srcdir = project({"index.rst": INDEX, "other.rst": OTHER})
+    outdir, _warnings = build(srcdir, *options, builder="proofcheck")
+
+    assert (outdir / "proofcheck.txt").read_text(encoding="utf8") == REPORT
+    problems = json.loads((outdir / "proofcheck.json").read_text(encoding="utf8"))
+    assert [
+        (problem["file"], problem["line"], problem["kind"])
+        for problem in problems["problems"]
+    ] == [
+        ("index.rst", 12, "undefined-label"),
+        ("index.rst", 14, "forward-dependency"),
+        ("index.rst", 18, "undefined-label"),
+        ("index.rst", 20, "undefined-label"),
+        ("index.rst", 22, "unknown-type"),
+        ("other.rst", 6, "duplicate-label"),
+    ]
+
+
+def test_intersphinx(project, build):
+    """Only labels prefixed by an intersphinx project are not checked."""
+    srcdir = project(
+        {
+            "conf.py": CONF
+            + 'extensions.append("sphinx.ext.intersphinx")\n'
+            + 'intersphinx_mapping = {"Other": ("https://example.org", "none.inv")}\n',
+            "index.rst": """
+                Root
+                ====
+
+                See :proof:ref:`thm:missing` and :proof:ref:`other:thm`.
+                """,
+        }
+    )
+    outdir, _warnings = build(srcdir, builder="proofcheck")
+
+    assert (outdir / "proofcheck.txt").read_text(encoding="utf8") == (
+        "index.rst:4: [undefined-label] undefined label: 'thm:missing'\n"
+    )
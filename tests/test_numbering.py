@@ -0,0 +1,84 @@
+# Copyright 2015-2025 Louis Paternault
+#
+# Sphinxcontrib-Proof is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sphinxcontrib-Proof is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Sphinxcontrib-Proof.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Numbering engine of HTML documents (``proof_html_numbering = "proof"``)."""
+
+import re
+
+import pytest
+from conftest import CONF
+
+INDEX = "Root\n====\n\n.. toctree::\n   :numbered:\n\n   first\n   second\n"
+
+CHAPTER = """
+{title}
+======
+
+.. proof:theorem:: First
+
+   Statement.
+
+.. proof:proof::
+
+   Proof.
+
+.. proof:lemma:: Second
+
+   Statement.
+"""
+
+
+def _numbers(outdir, docname):
+    """Return the statement titles of an HTML document."""
+    text = (outdir / f"{docname}.html").read_text(encoding="utf8")
+    return re.findall(r'<span class="proof-type">([^<]*?)\s*</span>', text)
+
+
+@pytest.mark.parametrize(
+    "conf, numbers",
+    [
+        # Proofs increment the counter shared by every type, like in LaTeX
+        ("", ["Theorem 1.1", "Proof", "Lemma 1.3"]),
+        # ...unless they are not defined as LaTeX theorems
+        (
+            'proof_latex_notheorem = ["proof"]\n',
+            ["Theorem 1.1", "Proof", "Lemma 1.2"],
+        ),
+        # Top-level sections of howto documents are LaTeX sections
+        (
+            'latex_documents = [("index", "a.tex", "A", "B", "howto")]\n'
+            'proof_latex_parent = "section"\n',
+            ["Theorem 1.1", "Proof", "Lemma 1.3"],
+        ),
+    ],
+    ids=["default", "notheorem", "howto"],
+)
+def test_latex_counter(project, build, conf, numbers):
+    """Statements are numbered like in the LaTeX document."""
+    srcdir = project(
+        {
+            "conf.py": CONF
+            + 'proof_html_numbering = "proof"\nproof_latex_parent = "chapter"\n'
+            + conf,
+            "index.rst": INDEX,
+            "first.rst": CHAPTER.format(title="First"),
+            "second.rst": CHAPTER.format(title="Second"),
+        }
+    )
+    outdir, _warnings = build(srcdir)
+    assert _numbers(outdir, "first") == numbers
+    assert _numbers(outdir, "second") == [
+        number.replace("1.", "2.") for number in numbers
+    ]
@@ -0,0 +1,58 @@
+# Copyright 2015-2025 Louis Paternault
+#
+# Sphinxcontrib-Proof is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sphinxcontrib-Proof is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Sphinxcontrib-Proof.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Standalone statement pages (option ``proof_html_statement_pages``)."""
+
+import pytest
+from conftest import CONF
+
+STATEMENT = ".. _{label}:\n\n.. proof:theorem::\n\n   Text.\n\n"
+
+
+@pytest.mark.parametrize("builder", ["html", "dirhtml"])
+def test_removed(project, build, builder):
+    """Pages of removed or relabelled statements are deleted."""
+    srcdir = project(
+        {
+            "conf.py": CONF + "proof_html_statement_pages = True\n",
+            "index.rst": "Root\n====\n\n.. toctree::\n\n   first\n   second\n",
+            "first.rst": "First\n=====\n\n"
+            + STATEMENT.format(label="kept")
+            + STATEMENT.format(label="old"),
+            "second.rst": "Second\n======\n\n" + STATEMENT.format(label="gone"),
+        }
+    )
+    # With builder dirhtml, pages are directories
+    suffix = ".html" if builder == "html" else ""
+
+    outdir, _warnings = build(srcdir, builder=builder)
+    assert (outdir / f"first.old{suffix}").exists()
+    assert (outdir / f"second.gone{suffix}").exists()
+
+    (srcdir / "first.rst").write_text(
+        "First\n=====\n\n"
+        + STATEMENT.format(label="kept")
+        + STATEMENT.format(label="new"),
+        encoding="utf8",
+    )
+    (srcdir / "second.rst").unlink()
+    (srcdir / "index.rst").write_text(
+        "Root\n====\n\n.. toctree::\n\n   first\n", encoding="utf8"
+    )
+    build(srcdir, builder=builder, outdir=outdir)
+    assert (outdir / f"first.kept{suffix}").exists()
+    assert (outdir / f"first.new{suffix}").exists()
+    assert not (outdir / f"first.old{suffix}").exists()
+    assert not (outdir / f"second.gone{suffix}").exists()
@@ -0,0 +1,93 @@
+# Copyright 2015-2025 Louis Paternault
+#
+# Sphinxcontrib-Proof is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sphinxcontrib-Proof is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Sphinxcontrib-Proof.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Parallel builds (``sphinx-build -j N``) are identical to serial builds."""
+
+import json
+
+DOCUMENTS = 300
+TYPES = ("theorem", "lemma", "definition")
+
+
+def _document(index):
+    """Return the source of document `index`.
+
+    Its statements reference statements of the previous document (and one of
+    its own statements), so that references cross the boundaries between the
+    chunks of documents read by different processes.
+    """
+    lines = [f"Chapter {index}", "=" * 20, ""]
+    for number, thmtype in enumerate(TYPES):
+        lines.extend([f".. _d{index}-{number}:", ""])
+        lines.extend([f".. proof:{thmtype}:: Title {index}-{number}", ""])
+        if index:
+            lines.append(
+                f"   See :proof:ref:`d{index - 1}-{number}`, "
+                f":proof:numref:`d{index - 1}-{number}` "
+                f"and :numref:`d{index - 1}-{(number + 1) % len(TYPES)}`."
+            )
+        else:
+            lines.append("   First statement.")
+        lines.extend(["", ".. proof:proof::", "", f"   Proof of :numref:`d{index}-0`."])
+        lines.append("")
+    lines.extend([".. proof:lemma::", "", "   Untitled, unlabelled lemma.", ""])
+    return "\n".join(lines)
+
+
+def _files():
+    """Return the files of the project."""
+    files = {
+        "index.rst": "Root\n====\n\n.. toctree::\n   :numbered:\n\n"
+        + "".join(f"   d{index}\n" for index in range(DOCUMENTS)),
+    }
+    for index in range(DOCUMENTS):
+        files[f"d{index}.rst"] = _document(index)
+    return files
+
+
+def test_parallel(project, build):
+    """Numbers and references of a parallel build are those of a serial build."""
+    srcdir = project(_files())
+
+    serial, serial_warnings = build(srcdir)
+    parallel, parallel_warnings = build(srcdir, "-j", "4")
+
+    assert not serial_warnings
+    assert not parallel_warnings
+    assert "Theorem 4.1" in (serial / "d3.html").read_text(encoding="utf8")
+    for index in range(DOCUMENTS):
+        assert (serial / f"d{index}.html").read_text(encoding="utf8") == (
+            parallel / f"d{index}.html"
+        ).read_text(encoding="utf8"), f"d{index}.html"
+
+
+def test_profile(project, build):
+    """Statements read by parallel processes are profiled once."""
+    srcdir = project(_files())
+
+    counts = []
+    for options in ((), ("-j", "4")):
+        outdir, _warnings = build(srcdir, "-D", "proof_profile=1", *options)
+        with open(outdir / "proof_profile.json", encoding="utf8") as file:
+            functions = json.load(file)["functions"]
+        counts.append(
+            {
+                name: functions[name]["count"]
+                for name in ("StatementEnvironment.run", "nested_parse")
+            }
+        )
+
+    assert counts[0]["StatementEnvironment.run"] == 7 * DOCUMENTS
+    assert counts[0] == counts[1]
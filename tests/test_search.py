@@ -0,0 +1,45 @@
+# Copyright 2015-2025 Louis Paternault
+#
+# Sphinxcontrib-Proof is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sphinxcontrib-Proof is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Sphinxcontrib-Proof.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Search index of statements (option ``proof_html_search``)."""
+
+import json
+
+from conftest import CONF
+
+
+def test_records(project, build):
+    """Records are in document order, and labelled statements use their label."""
+    srcdir = project(
+        {
+            "conf.py": CONF + "proof_html_search = True\n",
+            "index.rst": "Root\n====\n\n.. toctree::\n\n   zeta\n   alpha\n",
+            "zeta.rst": (
+                "Zeta\n====\n\n.. _zeta-label:\n\n"
+                ".. proof:theorem:: Labelled\n\n   Text.\n"
+            ),
+            "alpha.rst": "Alpha\n=====\n\n.. proof:lemma:: Anonymous\n\n   Text.\n",
+        }
+    )
+    outdir, _warnings = build(srcdir)
+
+    with open(
+        outdir / "_proof" / "search" / "statements" / "0.json", encoding="utf8"
+    ) as file:
+        records = json.load(file)
+    assert [(record[2], record[4]) for record in records] == [
+        ("Labelled", "zeta.html#zeta-label"),
+        ("Anonymous", "alpha.html#id1"),
+    ]
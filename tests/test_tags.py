@@ -0,0 +1,49 @@
+# Copyright 2015-2025 Louis Paternault
+#
+# Sphinxcontrib-Proof is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# Sphinxcontrib-Proof is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with Sphinxcontrib-Proof.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Permanent tags of statements (option ``proof_tags``)."""
+
+from conftest import CONF
+
+
+def _document(name):
+    """Return a document containing two labelled statements."""
+    return (
+        f"{name}\n====\n\n"
+        f".. _{name}-1:\n\n.. proof:theorem::\n\n   First.\n\n"
+        f".. _{name}-2:\n\n.. proof:lemma::\n\n   Second.\n"
+    )
+
+
+def test_allocate(project, build):
+    """Tags are allocated by HTML builders only, in document order."""
+    srcdir = project(
+        {
+            "conf.py": CONF + "proof_tags = True\n",
+            "index.rst": "Root\n====\n\n.. toctree::\n\n   zeta\n   alpha\n",
+            "alpha.rst": _document("alpha"),
+            "zeta.rst": _document("zeta"),
+        }
+    )
+    tagfile = srcdir / "proof-tags.txt"
+
+    for builder in ("latex", "proofcheck"):
+        build(srcdir, builder=builder)
+        assert not tagfile.exists()
+
+    build(srcdir, "-j", "2")
+    assert tagfile.read_text(encoding="utf8") == (
+        "0001 zeta-1\n0002 zeta-2\n0003 alpha-1\n0004 alpha-2\n"
+    )